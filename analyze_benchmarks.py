@@ -1,8 +1,52 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import hashlib
+import json
+from functools import lru_cache
 from pathlib import Path
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from registry import SOLVERS
+from instrumentation import read_traces, time_to_target
+
+
+@lru_cache(maxsize=None)
+def student_t():
+    # scipy.stats takes longer to import than the rest of the analysis, only fresh aggregates need it
+    try:
+        from scipy.stats import t
+    except ImportError:
+        return None
+    return t
+
+
+# exact solvers define the optimum, they are left out of the gap tables
+EXACT_ALGORITHMS = [name for name, solver in SOLVERS.items() if solver.exact]
+
+# per-partition aggregates and the signatures of the files they were computed from
+ANALYSIS_CACHE = 'analysis_cache'
+
+CONFIDENCE = 0.95
+
+# time-to-target: a run has reached its target once within this many percent of the instance's best weight
+TARGET_GAP = 1.0
+
+# one row per (instance, algorithm variant); label is the algorithm with its varying parameters
+TIDY_COLUMNS = ['num_nodes', 'instance_id', 'algorithm', 'label', 'time', 'weight', 'lower_bound']
+
+def load_benchmark_data(results_dir="results", mode=None):
+    # the results store when there is one: only the columns (and with `mode` only the
+    # partition) the analysis needs are read, otherwise the older per-size CSV files
+    if Path(results_dir).exists():
+        from results_store import read_results, wide_results
+        columns = ['run_id', 'instance_id', 'num_nodes', 'graph_num', 'algorithm', 'params', 'time', 'weight',
+                   'lower_bound']
+        results = read_results(results_dir, columns=columns, **({'mode': mode} if mode else {}))
+        combined_df = wide_results(results)
+        print(f"Loaded {len(results)} results from {results_dir}: {len(combined_df)} graphs, "
+              f"sizes {sorted(combined_df['num_nodes'].unique().tolist())}")
+        return combined_df
 
-def load_benchmark_data():
     benchmarks_dir = Path("benchmarks")
     all_data = []
 
@@ -20,131 +64,259 @@ def load_benchmark_data():
     combined_df = pd.concat(all_data, ignore_index=True)
     return combined_df
 
-def calculate_statistics(df):
-    algorithms = ['brute_force', 'christofides', 'nearest_neighbour', 'genetic', 'ant_colony']
-
-    stats = []
-
-    for num_nodes in sorted(df['num_nodes'].unique()):
-        node_data = df[df['num_nodes'] == num_nodes]
-
-        stat_row = {'num_nodes': num_nodes}
-
-        for algo in algorithms:
-            time_col = f'{algo}_time'
-            weight_col = f'{algo}_weight'
-
-            if time_col in node_data.columns:
-                avg_time = node_data[time_col].mean()
-                avg_weight = node_data[weight_col].mean()
+def algorithms_in(df):
+    # every algorithm with a weight column, in column order
+    return [col[:-len('_weight')] for col in df.columns if col.endswith('_weight') and col != 'optimal_weight']
+
+def tidy_from_wide(df):
+    # wide per-graph rows ({algorithm}_time/_weight/_lower_bound) -> one row per (graph, algorithm)
+    frames = []
+    for algo in algorithms_in(df):
+        frames.append(pd.DataFrame({
+            'num_nodes': df['num_nodes'],
+            'instance_id': df['num_nodes'].astype(str) + '_' + df['graph_num'].astype(str),
+            'algorithm': algo.split('[')[0],
+            'label': algo,
+            'time': df[f'{algo}_time'] if f'{algo}_time' in df.columns else np.nan,
+            'weight': df[f'{algo}_weight'],
+            'lower_bound': df[f'{algo}_lower_bound'] if f'{algo}_lower_bound' in df.columns else np.nan,
+        }))
+    if not frames:
+        return pd.DataFrame(columns=TIDY_COLUMNS)
+    # algorithms skipped for a size (too large) leave empty cells
+    return pd.concat(frames, ignore_index=True).dropna(subset=['weight'])
+
+def tidy_from_store(results):
+    # store rows are already long, the latest run wins for repeated jobs
+    from results_store import variant_labels
+    results = results.assign(algorithm=results['algorithm'].astype(str)).sort_values('run_id', kind='stable')
+    results = results.assign(label=variant_labels(results))
+    results = results.drop_duplicates(['instance_id', 'label'], keep='last')
+    return results[TIDY_COLUMNS].dropna(subset=['weight']).reset_index(drop=True)
+
+def add_gaps(tidy):
+    # gap: % above the instance optimum, known from an exact solver or a branch and bound run that closed its gap
+    # certified_gap: % above branch and bound's lower bound where no optimum is known (an upper bound on the gap)
+    exact = tidy[tidy['algorithm'].isin(EXACT_ALGORITHMS)]
+    bnb = tidy[tidy['algorithm'] == 'branch_and_bound']
+    proven = bnb[bnb['weight'] == bnb['lower_bound']]
+    optimum = exact.groupby('instance_id')['weight'].min().combine_first(proven.groupby('instance_id')['weight'].min())
+    bound = bnb.groupby('instance_id')['lower_bound'].max()
+
+    optimal = tidy['instance_id'].map(optimum)
+    lower = tidy['instance_id'].map(bound).where(optimal.isna())
+    heuristic = ~tidy['algorithm'].isin(EXACT_ALGORITHMS)
+    return tidy.assign(gap=((tidy['weight'] - optimal) / optimal * 100).where(heuristic),
+                       certified_gap=((tidy['weight'] - lower) / lower * 100).where(heuristic))
+
+def confidence_interval(std, count, level=CONFIDENCE):
+    # half-width of the interval around the mean, Student t when scipy is there, normal otherwise
+    count = np.asarray(count, dtype=float)
+    if student_t() is not None:
+        factor = student_t().ppf((1 + level) / 2, np.maximum(count - 1, 1))
+    else:
+        factor = NormalDist().inv_cdf((1 + level) / 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 1, factor * np.asarray(std, dtype=float) / np.sqrt(count), np.nan)
+
+def aggregate(tidy):
+    # one groupby over (num_nodes, label) for every statistic of the report
+    tidy = add_gaps(tidy)
+    stats = tidy.groupby(['num_nodes', 'label'], sort=False).agg(
+        algorithm=('algorithm', 'first'),
+        graphs=('weight', 'count'),
+        time_mean=('time', 'mean'), time_median=('time', 'median'), time_std=('time', 'std'),
+        time_count=('time', 'count'),
+        weight_mean=('weight', 'mean'), weight_std=('weight', 'std'), weight_count=('weight', 'count'),
+        gap_mean=('gap', 'mean'), gap_median=('gap', 'median'), gap_std=('gap', 'std'), gap_count=('gap', 'count'),
+        certified_gap_mean=('certified_gap', 'mean'), certified_gap_count=('certified_gap', 'count'),
+    ).reset_index()
+    for value in ('time', 'weight', 'gap'):
+        stats[f'{value}_ci'] = confidence_interval(stats.pop(f'{value}_std'), stats[f'{value}_count'])
+    return stats
+
+def label_order(aggregates):
+    # registry order, parameter variants of one algorithm next to each other
+    position = {name: i for i, name in enumerate(SOLVERS)}
+    labels = aggregates[['label', 'algorithm']].drop_duplicates('label')
+    return sorted(labels['label'], key=dict(zip(labels['label'], labels['algorithm'].map(
+        lambda algo: position.get(algo, len(position))))).get)
+
+def summary_tables(aggregates):
+    # the stats, optimality and certified gap tables of the report (one column per algorithm)
+    labels = label_order(aggregates)
+
+    def wide(value, suffix):
+        table = aggregates.pivot(index='num_nodes', columns='label', values=value).reindex(columns=labels)
+        table.columns = [f'{label}{suffix}' for label in labels]
+        return table.dropna(axis=1, how='all')
+
+    stats_df = pd.concat([wide('time_mean', '_avg_time'), wide('weight_mean', '_avg_weight'),
+                          wide('time_ci', '_time_ci'), wide('weight_ci', '_weight_ci')], axis=1)
+    stats_df = stats_df[[col for label in labels for col in stats_df.columns if col.startswith(f'{label}_')
+                         and col[len(label) + 1:] in ('avg_time', 'avg_weight', 'time_ci', 'weight_ci')]]
+
+    tables = [stats_df.reset_index()]
+    for value, suffix in (('gap_mean', '_avg_optimality_gap_%'), ('certified_gap_mean', '_max_optimality_gap_%')):
+        table = wide(value, suffix).dropna(how='all')
+        tables.append(table.reset_index() if not table.empty else pd.DataFrame())
+    return tuple(tables)
 
-                stat_row[f'{algo}_avg_time'] = avg_time
-                stat_row[f'{algo}_avg_weight'] = avg_weight
-
-        stats.append(stat_row)
-
-    stats_df = pd.DataFrame(stats)
-    return stats_df
+def calculate_statistics(df):
+    return summary_tables(aggregate(tidy_from_wide(df)))[0]
 
 def calculate_optimality_gap(df):
-    small_graphs = df[df['num_nodes'] <= 9]
-    algorithms = ['christofides', 'nearest_neighbour', 'genetic', 'ant_colony']
-
-    optimality_stats = []
-
-    for num_nodes in sorted(small_graphs['num_nodes'].unique()):
-        node_data = small_graphs[small_graphs['num_nodes'] == num_nodes]
-
-        if 'brute_force_weight' not in node_data.columns or node_data['brute_force_weight'].isna().all():
+    return summary_tables(aggregate(tidy_from_wide(df)))[1]
+
+def calculate_certified_gap(df):
+    # graphs without a known optimum, gaps are measured against the proven lower bound
+    # and are therefore upper bounds on the true optimality gap
+    return summary_tables(aggregate(tidy_from_wide(df)))[2]
+
+def scaling_exponents(aggregates):
+    # runtime ~ c * n^k per algorithm: least squares fit of log(median time) on log(num_nodes)
+    rows = []
+    timed = aggregates[aggregates['time_median'] > 0]
+    for label in label_order(timed):
+        data = timed[timed['label'] == label]
+        if data['num_nodes'].nunique() < 2:
             continue
-
-        stat_row = {'num_nodes': num_nodes}
-
-        for algo in algorithms:
-            weight_col = f'{algo}_weight'
-
-            if weight_col in node_data.columns:
-                differences = ((node_data[weight_col] - node_data['brute_force_weight']) /
-                             node_data['brute_force_weight'] * 100)
-
-                avg_diff = differences.mean()
-                stat_row[f'{algo}_avg_optimality_gap_%'] = avg_diff
-
-        optimality_stats.append(stat_row)
-
-    optimality_df = pd.DataFrame(optimality_stats)
-    return optimality_df
-
-def plot_runtime_vs_nodes(stats_df):
-    plt.figure(figsize=(12, 7))
-
-    algorithms = ['brute_force', 'christofides', 'nearest_neighbour', 'genetic', 'ant_colony']
-    colors = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6']
-    markers = ['o', 's', '^', 'D', 'v']
-
-    for algo, color, marker in zip(algorithms, colors, markers):
-        time_col = f'{algo}_avg_time'
-
-        if time_col in stats_df.columns:
-            data = stats_df[['num_nodes', time_col]].dropna()
-
-            if not data.empty:
-                plt.plot(data['num_nodes'], data[time_col],
-                        marker=marker, color=color, linewidth=2, markersize=8,
-                        label=algo.replace('_', ' ').title())
-
-    plt.xlabel('Liczba węzłów', fontsize=12, fontweight='bold')
-    plt.ylabel('Średni czas (s)', fontsize=12, fontweight='bold')
-    plt.title('Średni czas vs liczba węzłów', fontsize=14, fontweight='bold')
-    plt.legend(fontsize=10)
-    plt.grid(True, alpha=0.3)
-    plt.yscale('log')
-    plt.tight_layout()
-
-    output_file = 'runtime_vs_nodes.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    print(f"\n✓ Saved runtime plot to {output_file}")
-    plt.close()
-
-def plot_weight_vs_nodes(stats_df):
-    plt.figure(figsize=(12, 7))
-
-    algorithms = ['brute_force', 'christofides', 'nearest_neighbour', 'genetic', 'ant_colony']
-    colors = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6']
-    markers = ['o', 's', '^', 'D', 'v']
-
-    for algo, color, marker in zip(algorithms, colors, markers):
-        weight_col = f'{algo}_avg_weight'
-
-        if weight_col in stats_df.columns:
-            # Filter out NaN values
-            data = stats_df[['num_nodes', weight_col]].dropna()
-
-            if not data.empty:
-                plt.plot(data['num_nodes'], data[weight_col],
-                        marker=marker, color=color, linewidth=2, markersize=8,
-                        label=algo.replace('_', ' ').title())
-
-    plt.xlabel('Liczba węzłów', fontsize=12, fontweight='bold')
-    plt.ylabel('Średnia waga ścieżki', fontsize=12, fontweight='bold')
-    plt.title('Średnia waga ścieżki vs liczba węzłów', fontsize=14, fontweight='bold')
-    plt.legend(fontsize=10)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-
-    output_file = 'weight_vs_nodes.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    print(f"✓ Saved weight plot to {output_file}")
-    plt.close()
-
-def print_summary_tables(stats_df, optimality_df):
+        x, y = np.log(data['num_nodes'].to_numpy(float)), np.log(data['time_median'].to_numpy(float))
+        exponent, intercept = np.polyfit(x, y, 1)
+        residual = y - (exponent * x + intercept)
+        total = ((y - y.mean()) ** 2).sum()
+        rows.append({'label': label, 'exponent': exponent, 'coefficient': np.exp(intercept),
+                     'r2': 1 - (residual ** 2).sum() / total if total > 0 else np.nan,
+                     'sizes': len(data), 'min_nodes': data['num_nodes'].min(), 'max_nodes': data['num_nodes'].max()})
+    return pd.DataFrame(rows)
+
+def load_convergence(results_dir="results", mode=None, traces=None):
+    # runs recorded with benchmark.py --trace, from the results store or a trace file, with the best weight
+    # known for their instance (over every run, traced or not); convergence: [[iteration, seconds, cost], ...]
+    if traces is not None:
+        results = pd.DataFrame(read_traces(traces))
+        if mode is not None and not results.empty:
+            results = results[results['mode'] == mode]
+    else:
+        from results_store import read_results
+        if not (Path(results_dir) / f"mode={mode}" if mode else Path(results_dir)).exists():
+            return pd.DataFrame()
+        results = read_results(results_dir, columns=['mode', 'instance_id', 'num_nodes', 'algorithm', 'params', 'time',
+                                                     'weight', 'iterations', 'convergence'],
+                               **({'mode': mode} if mode else {}))
+        if results is None:
+            return pd.DataFrame()
+        results['convergence'] = results['convergence'].map(lambda points: json.loads(points) if isinstance(points, str) else None)
+    if results.empty:
+        return results
+
+    from results_store import variant_labels
+    results = results.assign(algorithm=results['algorithm'].astype(str), mode=results['mode'].astype(str))
+    results = results.assign(label=variant_labels(results),
+                             best_known=results.groupby('instance_id')['weight'].transform('min'))
+    return results[results['convergence'].notna() & results['weight'].notna()].reset_index(drop=True)
+
+def time_to_targets(runs, gap=TARGET_GAP):
+    # seconds each run took to get within gap % of its instance's best weight, NaN if it never did;
+    # solvers without iterations have an empty trace and reach their final weight when they return
+    targets = runs['best_known'] * (1 + gap / 100)
+    seconds = [time_to_target(points or [[0, elapsed, weight]], target)
+               for points, elapsed, weight, target in zip(runs['convergence'], runs['time'], runs['weight'], targets)]
+    return runs.assign(time_to_target=pd.to_numeric(pd.Series(seconds, index=runs.index), errors='coerce'))
+
+def convergence_table(runs):
+    # per label: how many iterations ran after the last improvement, and how often / how fast the target was hit
+    runs = runs.assign(iterations_to_best=runs['convergence'].map(lambda points: points[-1][0] if points else 0),
+                       time_to_best=runs['convergence'].map(lambda points: points[-1][1] if points else np.nan))
+    runs = runs.assign(idle=np.where(runs['iterations'] > 0,
+                                     1 - runs['iterations_to_best'] / runs['iterations'].where(runs['iterations'] > 0),
+                                     np.nan))
+    table = runs.groupby('label').agg(
+        runs=('weight', 'size'), iterations=('iterations', 'median'), iterations_to_best=('iterations_to_best', 'median'),
+        idle=('idle', 'median'), time_to_best=('time_to_best', 'median'),
+        reached=('time_to_target', lambda seconds: seconds.notna().mean()),
+        time_to_target=('time_to_target', 'median'))
+    return table.sort_values('time_to_target', na_position='last').reset_index()
+
+def file_signature(files):
+    digest = hashlib.sha1()
+    for path in files:
+        info = path.stat()
+        digest.update(f"{path.name}:{info.st_size}:{info.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+def result_partitions(results_dir="results", mode=None):
+    # {partition: signature of its input files}: the store's mode=/num_nodes= directories,
+    # or one partition per older CSV file
+    partitions = {}
+    if Path(results_dir).exists():
+        for directory in sorted(Path(results_dir).glob('mode=*/num_nodes=*')):
+            if mode is None or directory.parent.name == f'mode={mode}':
+                partitions[f'{directory.parent.name}/{directory.name}'] = file_signature(
+                    sorted(directory.glob('*.parquet')))
+    elif mode in (None, 'integer'):
+        for csv_file in sorted(Path("benchmarks").glob("benchmark_results_*.csv")):
+            partitions[csv_file.name] = file_signature([csv_file])
+    return partitions
+
+def load_partition(results_dir, partition):
+    if partition.endswith('.csv'):
+        # the CSVs predate the other generators
+        return 'integer', tidy_from_wide(pd.read_csv(Path("benchmarks") / partition))
+
+    from results_store import read_results
+    mode, num_nodes = (part.split('=', 1)[1] for part in partition.split('/'))
+    columns = ['run_id', 'instance_id', 'num_nodes', 'algorithm', 'params', 'time', 'weight', 'lower_bound']
+    return mode, tidy_from_store(read_results(results_dir, columns=columns, mode=mode, num_nodes=int(num_nodes)))
+
+def incremental_aggregates(results_dir="results", mode=None, cache_dir=ANALYSIS_CACHE, full=False):
+    # aggregates of every partition, cached next to the signatures of their input files: only partitions
+    # that are new or whose files changed are read and aggregated again
+    # returns (aggregates, changed) where changed lists the recomputed or removed partitions
+    cache_dir = Path(cache_dir)
+    cache_file, signature_file = cache_dir / 'aggregates.parquet', cache_dir / 'signatures.json'
+    partitions = result_partitions(results_dir, mode)
+
+    cached, signatures = None, {}
+    if not full and cache_file.exists() and signature_file.exists():
+        cached = pd.read_parquet(cache_file)
+        signatures = json.loads(signature_file.read_text())
+
+    stale = [partition for partition, signature in partitions.items() if signatures.get(partition) != signature]
+
+    # partitions of another mode or input kind are outside this call and stay in the cache untouched
+    from_csv = not Path(results_dir).exists()
+    def in_scope(partition):
+        if partition.endswith('.csv') != from_csv:
+            return False
+        return from_csv or mode is None or partition.startswith(f'mode={mode}/')
+    removed = [partition for partition in signatures if partition not in partitions and in_scope(partition)]
+
+    frames = []
+    if cached is not None:
+        frames.append(cached[~cached['partition'].isin(stale + removed)])
+    for partition in stale:
+        partition_mode, tidy = load_partition(results_dir, partition)
+        frames.append(aggregate(tidy).assign(mode=partition_mode, partition=partition))
+        print(f"Aggregated {partition}: {len(tidy)} results")
+    aggregates = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['partition'])
+
+    if stale or removed:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        aggregates.to_parquet(cache_file, index=False)
+        signatures = {partition: signature for partition, signature in signatures.items() if partition not in removed}
+        signature_file.write_text(json.dumps({**signatures, **partitions}, indent=2))
+    print(f"{len(partitions) - len(stale)} of {len(partitions)} partitions unchanged")
+    return aggregates[aggregates['partition'].isin(partitions)].reset_index(drop=True), stale + removed
+
+def print_summary_tables(stats_df, optimality_df, certified_df):
     print("\n" + "="*80)
     print("BENCHMARK ANALYSIS SUMMARY")
     print("="*80)
 
     print("\n--- AVERAGE RUNTIME (seconds) ---\n")
     runtime_cols = ['num_nodes']
-    algorithms = ['brute_force', 'christofides', 'nearest_neighbour', 'genetic', 'ant_colony']
+    algorithms = [col[:-len('_avg_time')] for col in stats_df.columns if col.endswith('_avg_time')]
 
     for algo in algorithms:
         time_col = f'{algo}_avg_time'
@@ -171,25 +343,118 @@ def print_summary_tables(stats_df, optimality_df):
 
     if not optimality_df.empty:
         print("\n--- AVERAGE OPTIMALITY GAP (% above optimal) ---")
-        print("(For graphs with 5-9 nodes, compared to Brute Force optimal solution)\n")
+        print("(For graphs solved exactly, compared to the Held-Karp / Brute Force / Branch and Bound optimum)\n")
 
         optimality_display = optimality_df.copy()
         optimality_display.columns = ['Nodes'] + [col.replace('_avg_optimality_gap_%', '').replace('_', ' ').title()
                                                    for col in optimality_df.columns[1:]]
         print(optimality_display.to_string(index=False, float_format=lambda x: f'{x:.2f}%'))
 
+    if not certified_df.empty:
+        print("\n--- CERTIFIED OPTIMALITY GAP (% above proven lower bound, upper bound on true gap) ---")
+        print("(For graphs where Branch and Bound hit its time budget)\n")
+
+        certified_display = certified_df.copy()
+        certified_display.columns = ['Nodes'] + [col.replace('_max_optimality_gap_%', '').replace('_', ' ').title()
+                                                 for col in certified_df.columns[1:]]
+        print(certified_display.to_string(index=False, float_format=lambda x: f'{x:.2f}%'))
+
     print("\n" + "="*80)
 
-def main():
-    df = load_benchmark_data()
-    stats_df = calculate_statistics(df)
-    optimality_df = calculate_optimality_gap(df)
+def print_interval_tables(aggregates, scaling_df):
+    level = f"{CONFIDENCE:.0%}"
+    labels = label_order(aggregates)
+
+    def display(value, ci, fmt):
+        table = aggregates.pivot(index='num_nodes', columns='label', values=value).reindex(columns=labels)
+        half = aggregates.pivot(index='num_nodes', columns='label', values=ci).reindex(columns=labels)
+        table = table.dropna(axis=1, how='all').dropna(how='all')
+        half = half.loc[table.index]
+        text = table.apply(lambda col: [fmt(mean) + (f" ± {fmt(h)}" if pd.notna(h) else "") if pd.notna(mean) else ""
+                                        for mean, h in zip(col, half[col.name])])
+        text.columns = [label.replace('_', ' ').title() for label in table.columns]
+        return text.rename_axis('Nodes').reset_index().to_string(index=False)
+
+    print(f"\n--- MEAN RUNTIME ± {level} CI (seconds) ---\n")
+    print(display('time_mean', 'time_ci', lambda x: f'{x:.6f}'))
+
+    if aggregates['gap_count'].sum() > 0:
+        print(f"\n--- OPTIMALITY GAP: MEAN ± {level} CI / MEDIAN (%) ---\n")
+        print(display('gap_mean', 'gap_ci', lambda x: f'{x:.2f}'))
+        print()
+        median = aggregates.pivot(index='num_nodes', columns='label', values='gap_median').reindex(
+            columns=labels).dropna(how='all').dropna(axis=1, how='all')
+        median.columns = [label.replace('_', ' ').title() for label in median.columns]
+        print(median.rename_axis('Nodes').reset_index().to_string(index=False, float_format=lambda x: f'{x:.2f}%'))
+
+    if not scaling_df.empty:
+        print("\n--- RUNTIME SCALING (median time ~ c * n^k, log-log least squares) ---\n")
+        scaling_display = scaling_df.assign(label=scaling_df['label'].str.replace('_', ' ').str.title())
+        scaling_display.columns = ['Algorithm', 'k', 'c', 'R²', 'Sizes', 'From', 'To']
+        print(scaling_display.to_string(index=False, float_format=lambda x: f'{x:.3g}'))
+
+def print_convergence_table(table, gap):
+    print("\n--- CONVERGENCE (traced runs, medians) ---\n")
+    display = table.assign(label=table['label'].str.replace('_', ' ').str.title(),
+                           idle=table['idle'] * 100, reached=table['reached'] * 100)
+    display.columns = ['Algorithm', 'Runs', 'Iterations', 'To best', 'Idle (%)', 'Time to best (s)',
+                       f'Within {gap:g}% (%)', 'Time to target (s)']
+    print(display.to_string(index=False, float_format=lambda x: f'{x:.4g}'))
 
-    print_summary_tables(stats_df, optimality_df)
+def main():
+    parser = argparse.ArgumentParser(description="Summarize benchmark results")
+    parser.add_argument("--results", default="results", help="results store (the CSVs in benchmarks/ without one)")
+    parser.add_argument("--mode", help="only this generator mode")
+    parser.add_argument("--cache", default=ANALYSIS_CACHE, help="directory of cached per-partition aggregates")
+    parser.add_argument("--full", action='store_true', help="ignore the cache and recompute every partition")
+    parser.add_argument("--dpi", type=int, default=300, help="plot resolution")
+    parser.add_argument("--no-plots", action='store_true', help="only print the tables")
+    parser.add_argument("--traces", help="benchmark.py --trace file to take convergence from instead of the store")
+    parser.add_argument("--target-gap", type=float, default=TARGET_GAP,
+                        help="time-to-target: percent above the best known weight that counts as reached")
+    args = parser.parse_args()
+
+    aggregates, changed = incremental_aggregates(args.results, args.mode, args.cache, args.full)
+    if aggregates.empty and args.traces is None:
+        print("No benchmark results found")
+        return
+
+    modes = sorted(aggregates['mode'].unique())
+    for mode in modes:
+        rows = aggregates[aggregates['mode'] == mode]
+        if len(modes) > 1:
+            print(f"\n##### {mode} #####")
+        stats_df, optimality_df, certified_df = summary_tables(rows)
+        print_summary_tables(stats_df, optimality_df, certified_df)
+        print_interval_tables(rows, scaling_exponents(rows))
+
+        if args.no_plots:
+            continue
 
-    print("\nGenerating plots")
-    plot_runtime_vs_nodes(stats_df)
-    plot_weight_vs_nodes(stats_df)
+        # plots are only redrawn when one of their partitions changed
+        suffix = f"_{mode}" if len(modes) > 1 else ""
+        outputs = [f'runtime_vs_nodes{suffix}.png', f'weight_vs_nodes{suffix}.png']
+        if any(partition in changed for partition in rows['partition'].unique()) or args.full \
+                or not all(Path(output).exists() for output in outputs):
+            print("\nGenerating plots")
+            from benchmark_plots import plot_runtime_vs_nodes, plot_weight_vs_nodes
+            plot_runtime_vs_nodes(stats_df, outputs[0], args.dpi)
+            plot_weight_vs_nodes(stats_df, outputs[1], args.dpi)
+        else:
+            print("\nPlots are up to date")
+
+    # time-to-target curves from the traced runs: how long each solver takes to get close to the best known tour
+    runs = load_convergence(args.results, args.mode, args.traces)
+    traced_modes = sorted(runs['mode'].unique()) if not runs.empty else []
+    for mode in traced_modes:
+        traced = time_to_targets(runs[runs['mode'] == mode], args.target_gap)
+        if len(traced_modes) > 1:
+            print(f"\n##### {mode} (traced) #####")
+        print_convergence_table(convergence_table(traced), args.target_gap)
+        if not args.no_plots:
+            from benchmark_plots import plot_time_to_target
+            suffix = f"_{mode}" if len(traced_modes) > 1 else ""
+            plot_time_to_target(traced, args.target_gap, f'time_to_target{suffix}.png', args.dpi)
 
 
 if __name__ == "__main__":
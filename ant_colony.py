@@ -1,19 +1,199 @@
-import acopy
+import time
+import numpy as np
+from distance_matrix import as_distance_matrix, as_graph, tour_cost
+from neighbour_index import candidate_distances, distances_from, neighbour_lists
+import instrumentation
+
+
+def sample_rows(weights, rng):
+    # one roulette-wheel draw per row, rows must have a positive total
+    cumulative = np.cumsum(weights, axis=1)
+    draws = rng.random(len(weights)) * cumulative[:, -1]
+    return np.minimum((cumulative <= draws[:, None]).sum(axis=1), weights.shape[1] - 1)
+
+
+def construct_tours(attractiveness, candidates, n_ants, rng, q0=0.0, local_update=None, full_rows=None):
+    # all ants advance one city per step; attractiveness holds the candidate edges only (same shape as
+    # candidates), full_rows(cities, targets) gives the other edges for ants whose candidates are all visited
+    n = len(attractiveness)
+    ants = np.arange(n_ants)
+    tours = np.empty((n_ants, n), dtype=np.intp)
+    visited = np.zeros((n_ants, n), dtype=bool)
+
+    current = rng.integers(0, n, size=n_ants)
+    tours[:, 0] = current
+    visited[ants, current] = True
+
+    for step in range(1, n):
+        options = candidates[current]
+        weights = attractiveness[current] * ~visited[ants[:, None], options]
+        nxt = np.empty(n_ants, dtype=np.intp)
+
+        has_candidate = weights.sum(axis=1) > 0
+        if has_candidate.any():
+            rows = weights[has_candidate]
+            choice = sample_rows(rows, rng)
+            if q0 > 0:
+                # ACS pseudo-random proportional rule: exploit the best edge with probability q0
+                exploit = rng.random(len(rows)) < q0
+                choice[exploit] = np.argmax(rows[exploit], axis=1)
+            nxt[has_candidate] = options[has_candidate, choice]
+
+        fallback = ~has_candidate
+        if fallback.any():
+            # only the cities some of these ants still have to visit
+            unvisited = ~visited[fallback]
+            targets = np.flatnonzero(unvisited.any(axis=0))
+            unvisited = unvisited[:, targets]
+            rows = full_rows(current[fallback], targets) * unvisited
+            # unvisited cities may all have vanishing weight, keep them reachable
+            rows = np.where(unvisited & (rows.sum(axis=1, keepdims=True) == 0), 1.0, rows)
+            nxt[fallback] = targets[sample_rows(rows, rng)]
+
+        if local_update is not None:
+            local_update(current, nxt)
+
+        tours[:, step] = nxt
+        visited[ants, nxt] = True
+        current = nxt
+
+    return tours
+
+
+def deposit(pheromone, tours, amounts):
+    # add amounts[k] to every edge of tour k, in both directions
+    frm = tours.ravel()
+    to = np.roll(tours, -1, axis=1).ravel()
+    amount = np.repeat(amounts, tours.shape[1])
+    np.add.at(pheromone, (frm, to), amount)
+    np.add.at(pheromone, (to, frm), amount)
 
 
 def ant_colony(graph, source_node, n_ants=10, n_iterations=100, alpha=1.0, beta=2.0,
-               evaporation_rate=0.5, Q=100):
+               evaporation_rate=0.5, Q=100, variant='as', neighbours=15, q0=0.9, stagnation=None, seed=None,
+               engine='native', time_limit=None):
 
     # alpha: Pheromone importance
     # beta: Distance importance (heuristic)
     # evaporation_rate: Pheromone evaporation rate
     # Q: Pheromone deposit factor
+    # variant: 'as' (Ant System), 'mmas' (MAX-MIN) or 'acs' (Ant Colony System)
+    # stagnation: stop after this many iterations without a better tour
+    # time_limit: stop after this many seconds and return the best tour so far
+
+    if engine == 'acopy':
+        return ant_colony_acopy(graph, source_node, n_ants, n_iterations, alpha, beta, evaporation_rate, Q)
+
+    instance = as_distance_matrix(graph)
+    n = len(instance)
+    rng = np.random.default_rng(seed if seed is not None else np.random.randint(2 ** 31))
+
+    if n < 3:
+        order = [instance.index[source_node]] + [i for i in range(n) if i != instance.index[source_node]]
+        path = instance.labels(order) + [source_node]
+        return tour_cost(instance, order).item(), path
+
+    # heuristic weights on the candidate edges only, a geometric instance never builds its matrix
+    candidates = neighbour_lists(instance, neighbours)
+    cities = np.arange(n)[:, None]
+    candidate_heuristic = (1.0 / (candidate_distances(instance, candidates).astype(np.float64) + 1e-10)) ** beta
+
+    # initial pheromone from a rough tour length estimate
+    estimate = tour_cost(instance, np.arange(n))
+    tau0 = 1.0 / (n * estimate)
+    if variant == 'acs':
+        pheromone = np.full((n, n), tau0)
+    elif variant == 'mmas':
+        pheromone = np.full((n, n), Q / (evaporation_rate * estimate))
+    else:
+        pheromone = np.full((n, n), Q / estimate)
+
+    best_tour = None
+    best_cost = np.inf
+    stale = 0
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    trace = instrumentation.current()
+
+    def full_rows(rows, targets):
+        # attractiveness of the edges rows x targets, only for the few ants that ran out of candidates
+        distances = distances_from(instance, rows, targets).astype(np.float64, copy=False)
+        return pheromone[rows[:, None], targets] ** alpha * (1.0 / (distances + 1e-10)) ** beta
+
+    for iteration in range(n_iterations):
+        # always finish one iteration so there is a tour to return
+        if deadline is not None and iteration > 0 and time.perf_counter() > deadline:
+            break
+        attractiveness = pheromone[cities, candidates] ** alpha * candidate_heuristic
+
+        local_update = None
+        if variant == 'acs':
+            def local_update(frm, to):
+                # ACS local rule, ants wear down the edges they just used
+                pheromone[frm, to] = (1 - evaporation_rate) * pheromone[frm, to] + evaporation_rate * tau0
+                pheromone[to, frm] = pheromone[frm, to]
+                # and the candidate weights of both ends follow
+                ends = np.concatenate([frm, to])
+                attractiveness[ends] = pheromone[ends[:, None], candidates[ends]] ** alpha * candidate_heuristic[ends]
+
+        tours = construct_tours(attractiveness, candidates, n_ants, rng, q0 if variant == 'acs' else 0.0,
+                                local_update, full_rows)
+        costs = tour_cost(instance, tours)
+
+        iteration_best = int(np.argmin(costs))
+        if costs[iteration_best] < best_cost - 1e-9:
+            best_cost = costs[iteration_best]
+            best_tour = tours[iteration_best].copy()
+            stale = 0
+        else:
+            stale += 1
+        if trace is not None:
+            # moves: candidate edges weighed while building the tours (fallback rows not included)
+            trace.iteration(best_cost, distance_lookups=tours.size,
+                            moves_evaluated=n_ants * (n - 1) * candidates.shape[1])
+
+        if variant == 'acs':
+            # global rule on the best-so-far tour only
+            edges = (best_tour, np.roll(best_tour, -1))
+            pheromone[edges] = (1 - evaporation_rate) * pheromone[edges] + evaporation_rate / best_cost
+            pheromone[edges[::-1]] = pheromone[edges]
+        elif variant == 'mmas':
+            pheromone *= 1 - evaporation_rate
+            deposit(pheromone, tours[iteration_best:iteration_best + 1], np.array([Q / costs[iteration_best]]))
+            tau_max = Q / (evaporation_rate * best_cost)
+            np.clip(pheromone, tau_max / (2 * n), tau_max, out=pheromone)
+        else:
+            pheromone *= 1 - evaporation_rate
+            deposit(pheromone, tours, Q / costs)
+
+        if stagnation is not None and stale >= stagnation:
+            break
+
+    path = instance.labels(best_tour)
+    distance = tour_cost(instance, best_tour).item()
+
+    # rotate path to start with source_node
+    if source_node in path:
+        index = path.index(source_node)
+        path = path[index:] + path[:index]
+
+    # ensure path ends with the starting node
+    if not path or path[-1] != path[0]:
+        path.append(path[0])
+
+    return distance, path
+
+
+def ant_colony_acopy(graph, source_node, n_ants=10, n_iterations=100, alpha=1.0, beta=2.0,
+                     evaporation_rate=0.5, Q=100):
+    # the original acopy solver, kept for comparison with earlier benchmark results
+    import acopy
 
     # create solver and colony
     solver = acopy.Solver(rho=evaporation_rate, q=Q)
     colony = acopy.Colony(alpha=alpha, beta=beta)
 
     # solve TSP on the networkx graph
+    graph = as_graph(graph)
     tour = solver.solve(graph, colony, limit=n_iterations, gen_size=n_ants)
 
     # extract path and distance
@@ -30,4 +210,3 @@ def ant_colony(graph, source_node, n_ants=10, n_iterations=100, alpha=1.0, beta=
         path.append(path[0])
 
     return distance, path
-
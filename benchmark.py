@@ -1,168 +1,528 @@
-import time
 import csv
+import math
+import random
+import zlib
+import argparse
+import json
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from generator import Generator
-from christofides import christofides
-from brute_force import brute_force
-from nearest_neighbour import nearest_neighbour
-from genetic import genetic
-from ant_colony import ant_colony
+from pathlib import Path
+from generator import Generator, INSTANCE_MODES
+from distance_matrix import DistanceMatrix, tour_cost
+from instance_store import instance_name, instance_path, has_instance, save_instance, load_instance
+from timing import measure
+from instrumentation import append_traces
+from budget import run_with_budget, COMPLETED, TIME_LIMIT, ERROR
+from tsplib import read_tsplib
+from registry import SOLVERS, get_solver, resolve
+from solution_cache import CACHE_FILE, SolutionCache, solution_key
+from plans import (CONFIG_FILE, load_config, algorithm_budget, planned_algorithms, load_plan, expand_plan,
+                   job_params, params_key, shard)
 
+# solvers, their default parameters and size limits are registered in registry.py,
+# time/memory budgets live in benchmark_config.json, benchmark plans in plans/
 
-def run_algorithm(name, algorithm_func, graph, source_node=0):
+CHECKPOINT_FIELDS = ['mode', 'instance_id', 'graph_num', 'num_nodes', 'algorithm', 'seed', 'time', 'weight',
+                     'lower_bound', 'params', 'tour', 'time_iqr', 'cpu_time', 'peak_memory', 'repeats', 'outliers',
+                     'samples', 'status', 'iterations', 'time_to_best', 'counters', 'convergence']
+
+# the trace summary columns of a row, filled by a traced call
+TRACE_FIELDS = ['iterations', 'time_to_best', 'counters', 'convergence']
+
+# one timed call per job, like the original time.time() pair
+DEFAULT_TIMING = {'warmup': 0, 'repeat': 1}
+
+RESULTS_DIR = 'results'
+
+# sizes and algorithms of a run without --plan
+DEFAULT_PLAN = Path(__file__).with_name('plans') / 'default.json'
+
+
+def run_algorithm(name, algorithm_func, graph, source_node=0, **kwargs):
+    stats, weight, path, *extra = measure_algorithm(name, algorithm_func, graph, source_node, **kwargs)
+    return (stats['median'] if stats is not None else None, weight, path, *extra)
+
+
+def measure_algorithm(name, algorithm_func, graph, source_node=0, timing=None, setup=None, **kwargs):
+    # timing: keyword arguments for timing.measure (warmup, repeat, min_time, memory, trace)
     try:
-        start_time = time.time()
-        weight, path = algorithm_func(graph, source_node) if source_node is not None else algorithm_func(graph)
-        execution_time = time.time() - start_time
-        return execution_time, weight, path
+        args = (graph, source_node) if source_node is not None else (graph,)
+        result, stats = measure(algorithm_func, *args, setup=setup, **(timing or DEFAULT_TIMING), **kwargs)
+        weight, path, *extra = result
+
+        # cross-check the reported weight against the tour itself
+        if isinstance(graph, DistanceMatrix):
+            actual = tour_cost(graph, graph.indices(path)).item()
+            if not math.isclose(actual, weight, rel_tol=1e-5):
+                print(f"  Warning: {name} reported weight {weight}, tour costs {actual}")
+
+        return (stats, weight, path, *extra)
 
+    except MemoryError:
+        # out of the memory budget, the budgeted worker reports it
+        raise
     except Exception as e:
         print(f"  Error running {name}: {e}")
         return None, None, None
 
 
-def benchmark_graph(graph_num, num_nodes, source_node=0):
+def job_seed(base_seed, num_nodes, graph_num, algorithm=''):
+    # stable across processes and runs, unlike hash()
+    return zlib.crc32(f"{base_seed}:{num_nodes}:{graph_num}:{algorithm}".encode())
+
+
+def generate_instance(num_nodes, graph_num, base_seed=0, mode='integer', store=None):
+    # with a store the instance is generated once, later runs and worker processes map it from disk
+    seed = job_seed(base_seed, num_nodes, graph_num)
+    if store is None:
+        return Generator(num_nodes, mode=mode, seed=seed).instance
+
+    path = instance_path(store, mode, num_nodes, graph_num, seed)
+    if not has_instance(path):
+        instance = Generator(num_nodes, mode=mode, seed=seed).instance
+        save_instance(instance, path, mode=mode, seed=seed, num_nodes=num_nodes, graph_num=graph_num)
+    return load_instance(path)
+
+
+def run_job(graph, graph_num, num_nodes, algorithm, seed, source_node=0, verbose=False, timing=None, params=None):
+    # one (graph, algorithm) pair, RNGs pinned so serial and parallel runs agree
+    display_name = get_solver(algorithm).display_name
+    solver = resolve(algorithm)
+    kwargs = {**get_solver(algorithm).params, **(params or {})}
+    tour = None
+
+    def reseed():
+        # every warmup and repeat starts from the same RNG state
+        random.seed(seed)
+        np.random.seed(seed)
+
+    if verbose:
+        print(f"Running {display_name}...", end=" ", flush=True)
+
+    stats, weight, path, *extra = measure_algorithm(display_name, solver, graph, source_node, timing, reseed, **kwargs)
+    exec_time = stats['median'] if stats is not None else None
+    trace = stats.get('trace') if stats is not None else None
+
+    if path is not None and isinstance(graph, DistanceMatrix):
+        # the tour as instance indices, without the repeated start node
+        tour = graph.indices(path[:-1] if len(path) > 1 and path[-1] == path[0] else path).tolist()
+
+    if verbose:
+        if exec_time is None:
+            print("Failed")
+        elif extra:
+            print(f"Done in {exec_time:.4f}s, weight: {weight}, lower bound: {extra[0]}")
+        else:
+            print(f"Done in {exec_time:.4f}s, weight: {weight}")
+
+    return {
+        'graph_num': graph_num,
+        'num_nodes': num_nodes,
+        'algorithm': algorithm,
+        'seed': seed,
+        'time': exec_time,
+        'weight': weight,
+        'lower_bound': extra[0] if extra else None,
+        'params': json.dumps(kwargs, sort_keys=True),
+        'tour': tour,
+        'time_iqr': stats['iqr'] if stats is not None else None,
+        'cpu_time': stats['cpu_time'] if stats is not None else None,
+        'peak_memory': stats['peak_memory'] if stats is not None else None,
+        'repeats': stats['repeat'] if stats is not None else None,
+        'outliers': len(stats['outliers']) if stats is not None else None,
+        'samples': stats['samples'] if stats is not None else None,
+        'status': COMPLETED if exec_time is not None else ERROR,
+        'iterations': trace['iterations'] if trace else None,
+        'time_to_best': trace['time_to_best'] if trace else None,
+        'counters': json.dumps(trace['counters'], sort_keys=True) if trace else None,
+        'convergence': json.dumps(trace['convergence']) if trace else None,
+        # the per-iteration series, taken off the row again for the trace file
+        **({'trace': trace} if trace else {}),
+    }
+
+
+def run_budgeted_job(graph, graph_num, num_nodes, algorithm, seed, source_node=0, verbose=False, timing=None,
+                     config=None, params=None):
+    # run_job in a forked worker with the algorithm's time and memory budget; anytime solvers get
+    # the time budget as their own time_limit (see plans.job_params) and hand back their best tour,
+    # the rest are killed
+    config = config if config is not None else load_config()
+    budget = algorithm_budget(config, algorithm)
+    time_limit, memory_mb = budget.get('time_limit'), budget.get('memory_limit_mb')
+    params = params if params is not None else job_params(algorithm, {}, config)
+
+    args = (graph, graph_num, num_nodes, algorithm, seed, source_node, verbose, timing, params)
+    if time_limit is None and memory_mb is None:
+        return run_job(*args)
+
+    deadline = None
+    if time_limit is not None:
+        # every warmup/repeat/memory call gets the full budget, plus a grace period to return
+        timing = timing or DEFAULT_TIMING
+        calls = (timing.get('warmup', 1) + max(timing.get('repeat', 5), 1) + bool(timing.get('memory'))
+                 + bool(timing.get('trace')))
+        deadline = time_limit * calls + timing.get('min_time', 0.0) + max(1.0, 0.1 * time_limit)
+
+    status, row = run_with_budget(run_job, args, time_limit=deadline,
+                                  memory_limit=memory_mb * 2 ** 20 if memory_mb is not None else None)
+    if status != COMPLETED:
+        row = dict.fromkeys(CHECKPOINT_FIELDS)
+        row.update(graph_num=graph_num, num_nodes=num_nodes, algorithm=algorithm, seed=seed, status=status,
+                   params=params_key(algorithm, params))
+        if verbose:
+            print(f"Stopped: {status}")
+    elif budget['anytime'] and 'time_limit' in params and row['time'] is not None \
+            and row['time'] >= 0.99 * params['time_limit']:
+        row['status'] = TIME_LIMIT
+    return row
+
+
+def cached_row(cache, graph, algorithm, seed, params):
+    # (key, cached row) of a job; no key without a cache, no row on a miss
+    if cache is None or not isinstance(graph, DistanceMatrix):
+        return None, None
+    key = solution_key(graph, algorithm, params_key(algorithm, params), seed)
+    return key, cache.get(key)
+
+
+def cache_row(cache, key, row):
+    # only finished runs are worth reusing, the graph number is the caller's
+    if key is not None and row['status'] in (COMPLETED, TIME_LIMIT):
+        cache.put(key, {field: value for field, value in row.items() if field != 'graph_num'})
+
+
+def describe(row):
+    if row['time'] is None:
+        return f"Failed ({row['status']})"
+    cut_off = " (stopped at time limit)" if row['status'] == TIME_LIMIT else ""
+    return f"{row['time']:.4f}s, weight: {row['weight']}{cut_off}"
+
+
+def result_fieldnames():
+    fieldnames = ['graph_num', 'num_nodes']
+    for name, solver in SOLVERS.items():
+        fieldnames += [f'{name}_time', f'{name}_weight']
+        if solver.lower_bound:
+            fieldnames.append(f'{name}_lower_bound')
+    return fieldnames
+
+
+def merge_rows(job_rows, num_graphs, num_nodes):
+    # long (graph, algorithm) rows -> one wide row per graph in the benchmark_results schema
+    fieldnames = result_fieldnames()
+    results = {}
+    for graph_num in range(1, num_graphs + 1):
+        results[graph_num] = dict.fromkeys(fieldnames)
+        results[graph_num].update({'graph_num': graph_num, 'num_nodes': num_nodes})
+
+    for row in job_rows:
+        if row['graph_num'] not in results:
+            continue
+        merged = results[row['graph_num']]
+        merged[f"{row['algorithm']}_time"] = row['time']
+        merged[f"{row['algorithm']}_weight"] = row['weight']
+        if f"{row['algorithm']}_lower_bound" in merged:
+            merged[f"{row['algorithm']}_lower_bound"] = row['lower_bound']
+
+    return [results[graph_num] for graph_num in sorted(results)]
+
+
+def benchmark_graph(graph_num, num_nodes, source_node=0, base_seed=0, mode='integer', store=None, config=None):
     print(f"\n{'='*70}")
     print(f"Graph #{graph_num + 1}")
     print(f"{'='*70}")
 
     # generate graph
-    gen = Generator(num_nodes)
-    graph = gen.graph
+    graph = generate_instance(num_nodes, graph_num + 1, base_seed, mode, store)
 
-    results = {
-        'graph_num': graph_num + 1,
-        'num_nodes': num_nodes,
-    }
+    config = config if config is not None else load_config()
+    planned = planned_algorithms(num_nodes, config=config)
+    job_rows = []
+    for name, solver in SOLVERS.items():
+        if name not in planned:
+            print(f"Skipping {solver.display_name} (too large)")
+            continue
+        seed = job_seed(base_seed, num_nodes, graph_num + 1, name)
+        job_rows.append(run_budgeted_job(graph, graph_num + 1, num_nodes, name, seed, source_node, verbose=True,
+                                         config=config))
 
-    # run brute force (only for small graphs)
-    if num_nodes < 10:
-        print("Running Brute Force...", end=" ", flush=True)
-        exec_time, weight, path = run_algorithm("Brute Force", brute_force, graph, source_node)
-        if exec_time is not None:
-            print(f"Done in {exec_time:.4f}s, weight: {weight}")
-            results['brute_force_time'] = exec_time
-            results['brute_force_weight'] = weight
-        else:
-            print("Failed")
-            results['brute_force_time'] = None
-            results['brute_force_weight'] = None
-    else:
-        print("Skipping Brute Force (too large)")
-        results['brute_force_time'] = None
-        results['brute_force_weight'] = None
-
-
-    # run christofides
-    print("Running Christofides...", end=" ", flush=True)
-    exec_time, weight, path = run_algorithm("Christofides", christofides, graph, source_node)
-    if exec_time is not None:
-        print(f"Done in {exec_time:.4f}s, weight: {weight}")
-        results['christofides_time'] = exec_time
-        results['christofides_weight'] = weight
-    else:
-        print("Failed")
-        results['christofides_time'] = None
-        results['christofides_weight'] = None
-
-    # run nearest neighbour
-    print("Running Nearest Neighbour...", end=" ", flush=True)
-    exec_time, weight, path = run_algorithm("Nearest Neighbour", nearest_neighbour, graph, source_node)
-    if exec_time is not None:
-        print(f"Done in {exec_time:.4f}s, weight: {weight}")
-        results['nearest_neighbour_time'] = exec_time
-        results['nearest_neighbour_weight'] = weight
-    else:
-        print("Failed")
-        results['nearest_neighbour_time'] = None
-        results['nearest_neighbour_weight'] = None
-
-    # run genetic algorithm
-    print("Running Genetic Algorithm...", end=" ", flush=True)
-    exec_time, weight, path = run_algorithm("Genetic Algorithm", genetic, graph, source_node)
-    if exec_time is not None:
-        print(f"Done in {exec_time:.4f}s, weight: {weight}")
-        results['genetic_time'] = exec_time
-        results['genetic_weight'] = weight
-    else:
-        print("Failed")
-        results['genetic_time'] = None
-        results['genetic_weight'] = None
-
-    # run ant colony optimization
-    print("Running Ant Colony Optimization...", end=" ", flush=True)
-    exec_time, weight, path = run_algorithm("Ant Colony", ant_colony, graph, source_node)
-    if exec_time is not None:
-        print(f"Done in {exec_time:.4f}s, weight: {weight}")
-        results['ant_colony_time'] = exec_time
-        results['ant_colony_weight'] = weight
-    else:
-        print("Failed")
-        results['ant_colony_time'] = None
-        results['ant_colony_weight'] = None
+    return merge_rows(job_rows, graph_num + 1, num_nodes)[graph_num]
+
+
+def load_checkpoint(checkpoint_filename):
+    # rows written by an earlier (possibly interrupted) run of the same size
+    rows = []
+    if not Path(checkpoint_filename).exists():
+        return rows
+
+    def parse_number(value):
+        # integer weights were written without a decimal point, keep them ints
+        if value == '':
+            return None
+        return int(value) if value.lstrip('-').isdigit() else float(value)
 
-    return results
+    with open(checkpoint_filename, newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            rows.append({
+                'mode': row['mode'],
+                'instance_id': row['instance_id'],
+                'graph_num': int(row['graph_num']),
+                'num_nodes': int(row['num_nodes']),
+                'algorithm': row['algorithm'],
+                'seed': int(row['seed']),
+                'time': parse_number(row['time']),
+                'weight': parse_number(row['weight']),
+                'lower_bound': parse_number(row['lower_bound']),
+                'params': row['params'],
+                'tour': [int(city) for city in row['tour'].split()] if row['tour'] else None,
+                'time_iqr': parse_number(row['time_iqr']),
+                'cpu_time': parse_number(row['cpu_time']),
+                'peak_memory': parse_number(row['peak_memory']),
+                'repeats': parse_number(row['repeats']),
+                'outliers': parse_number(row['outliers']),
+                'samples': [float(sample) for sample in row['samples'].split()] if row['samples'] else None,
+                'status': row['status'],
+                # checkpoints from before tracing have no trace columns
+                'iterations': parse_number(row.get('iterations') or ''),
+                'time_to_best': parse_number(row.get('time_to_best') or ''),
+                'counters': row.get('counters') or None,
+                'convergence': row.get('convergence') or None,
+            })
+    return rows
 
 
-def run_benchmark(num_graphs=50, num_nodes=10):
+def trace_record(row, trace):
+    # one trace file line: what was run and the full Trace.to_dict()
+    return {**{field: row.get(field) for field in ('mode', 'instance_id', 'graph_num', 'num_nodes', 'algorithm',
+                                                  'params', 'seed', 'weight', 'time', 'status')}, **trace}
+
+
+def run_jobs(jobs, checkpoint_filename, workers=1, base_seed=0, store=None, run_id=None, results_dir=RESULTS_DIR,
+             timing=None, config=None, cache=None, trace_file=None):
+    # every finished job is appended to the checkpoint, a restarted run skips what is already in it
+    # cache: a SolutionCache consulted before a job runs and filled after it
+    # trace_file: JSON-lines file for the convergence traces, every job then makes one extra traced call
+    config = config if config is not None else load_config()
+    if trace_file is not None:
+        timing = {**(timing or DEFAULT_TIMING), 'trace': True}
+    job_rows = load_checkpoint(checkpoint_filename)
+    # a checkpoint only resumes the same jobs on the same instances: every row has to be one of the jobs
+    # with the seed this run would give it
+    seeds = {(job.mode, job.num_nodes, job.graph_num, job.algorithm, params_key(job.algorithm, job.params)):
+             job_seed(base_seed, job.num_nodes, job.graph_num, job.algorithm) for job in jobs}
+    done = set()
+    for row in job_rows:
+        key = (row['mode'], row['num_nodes'], row['graph_num'], row['algorithm'], row['params'])
+        if seeds.get(key) != row['seed']:
+            raise ValueError(f"{checkpoint_filename} was written by another plan or seed, "
+                             f"rerun that plan or remove the checkpoint")
+        done.add(key)
+    if done:
+        print(f"Resuming from {checkpoint_filename}: {len(done)} jobs already finished")
+    pending = [job for job in jobs if (job.mode, job.num_nodes, job.graph_num, job.algorithm,
+                                       params_key(job.algorithm, job.params)) not in done]
+
+    new_file = not Path(checkpoint_filename).exists()
+    with open(checkpoint_filename, 'a', newline='') as checkpoint:
+        writer = csv.DictWriter(checkpoint, fieldnames=CHECKPOINT_FIELDS)
+        if new_file:
+            writer.writeheader()
+
+        def record(job, row, key=None, cached=False):
+            trace = row.pop('trace', None)
+            cache_row(cache, key, row)
+            instance_seed = job_seed(base_seed, job.num_nodes, job.graph_num)
+            row = dict(row, mode=job.mode, instance_id=instance_name(job.mode, job.num_nodes, job.graph_num,
+                                                                     instance_seed))
+            if trace is not None and trace_file is not None:
+                append_traces(trace_file, [trace_record(row, trace)])
+            writer.writerow(dict(row, tour=' '.join(map(str, row['tour'])) if row['tour'] else '',
+                                 samples=' '.join(map(repr, row['samples'])) if row['samples'] else ''))
+            checkpoint.flush()
+            job_rows.append(row)
+            print(f"  {job.mode} n={job.num_nodes} graph #{job.graph_num} {job.algorithm}: {describe(row)}"
+                  + (" (cached)" if cached else ""))
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        futures = {}
+        instance_key, graph = None, None
+        try:
+            # jobs are grouped by instance, so each instance is generated (or mapped) once
+            for job in pending:
+                if (job.mode, job.num_nodes, job.graph_num) != instance_key:
+                    instance_key = (job.mode, job.num_nodes, job.graph_num)
+                    graph = generate_instance(job.num_nodes, job.graph_num, base_seed, job.mode, store)
+
+                seed = job_seed(base_seed, job.num_nodes, job.graph_num, job.algorithm)
+                key, hit = cached_row(cache, graph, job.algorithm, seed, job.params)
+                if hit is not None:
+                    record(job, dict(hit, graph_num=job.graph_num), cached=True)
+                    continue
+
+                args = (graph, job.graph_num, job.num_nodes, job.algorithm, seed)
+                options = {'timing': timing, 'config': config, 'params': job.params}
+                if executor is None:
+                    record(job, run_budgeted_job(*args, **options), key)
+                else:
+                    futures[executor.submit(run_budgeted_job, *args, **options)] = (job, key)
+
+            for future in as_completed(futures):
+                job, key = futures[future]
+                record(job, future.result(), key)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    # the finished run goes to the results store, the checkpoint was only needed to resume it
+    # (pyarrow is imported here, solving never needs it)
+    from results_store import append_results, new_run_id
+    run_id = run_id or new_run_id()
+    print(f"\n{'='*70}")
+    print(f"Saving {len(job_rows)} results to {results_dir} (run {run_id})...")
+    append_results(results_dir, run_id, job_rows)
+    Path(checkpoint_filename).unlink()
+    print(f"✓ Results saved to {results_dir}")
+
+
+def run_plan(plan, workers=1, store=None, run_id=None, results_dir=RESULTS_DIR, timing=None, config=None,
+             shard_index=0, shard_count=1, checkpoint_name=None, cache=None, trace_file=None):
+    config = config if config is not None else load_config()
+    jobs = shard(expand_plan(plan, config), shard_index, shard_count)
+    timing = timing if timing is not None else plan.get('timing')
+
     print("="*70)
     print("TSP ALGORITHMS BENCHMARK")
     print("="*70)
-    print(f"Number of graphs: {num_graphs}")
-    print(f"Nodes per graph: {num_nodes}")
+    print(f"Plan: {plan['name']}" + (f" (shard {shard_index + 1}/{shard_count})" if shard_count > 1 else ""))
+    print(f"Generator mode: {plan.get('generator', 'integer')}")
+    print(f"Sizes: {plan['sizes']}")
+    print(f"Graphs per size: {plan.get('graphs', 1)}")
+    print(f"Jobs: {len(jobs)}")
+    print(f"Workers: {workers}")
     print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*70)
 
-    all_results = []
+    suffix = checkpoint_name or (plan['name'] if shard_count == 1 else f"{plan['name']}_{shard_index}of{shard_count}")
+    if checkpoint_name is None:
+        # one checkpoint per seed, runs of different seeds can be interrupted side by side
+        suffix = f"{suffix}_seed{plan.get('seed', 0)}"
+    run_jobs(jobs, f"benchmark_checkpoint_{suffix}.csv", workers, plan.get('seed', 0), store, run_id, results_dir,
+             timing, config, cache, trace_file)
 
-    # run benchmark on each graph
-    for i in range(num_graphs):
-        results = benchmark_graph(i, num_nodes)
-        all_results.append(results)
 
-    # save results to CSV
-    csv_filename = f"benchmark_results_{num_nodes}.csv"
+def run_benchmark(num_graphs=50, num_nodes=10, workers=1, base_seed=0, mode='integer', algorithms=None, store=None,
+                  run_id=None, results_dir=RESULTS_DIR, timing=None, config=None, cache=None, trace_file=None):
+    # a one-size plan, the original integer generator keeps the historical checkpoint names
+    plan = {'name': f"{mode}_{num_nodes}", 'generator': mode, 'sizes': [num_nodes], 'graphs': num_graphs,
+            'seed': base_seed, 'algorithms': algorithms or load_plan(DEFAULT_PLAN)['algorithms']}
+    run_plan(plan, workers, store, run_id, results_dir, timing, config,
+             checkpoint_name=f"{num_nodes}" if mode == 'integer' else f"{mode}_{num_nodes}", cache=cache,
+             trace_file=trace_file)
 
-    print(f"\n{'='*70}")
-    print(f"Saving results to {csv_filename}...")
 
-    fieldnames = [
-        'graph_num', 'num_nodes',
-        'brute_force_time', 'brute_force_weight',
-        'christofides_time', 'christofides_weight',
-        'nearest_neighbour_time', 'nearest_neighbour_weight',
-        'genetic_time', 'genetic_weight',
-        'ant_colony_time', 'ant_colony_weight'
-    ]
+def run_tsplib(files, workers=1, algorithms=None, store=None, run_id=None, results_dir=RESULTS_DIR, timing=None,
+               config=None, cache=None, trace_file=None):
+    # every solver on standard library instances, stored under mode=tsplib with the file name as instance id
+    instances = []
+    for filename in files:
+        name = Path(filename).stem
+        instance = read_tsplib(filename)
+        if store is not None:
+            path = Path(store) / f"tsplib_{name}"
+            save_instance(instance, path, mode='tsplib', name=name)
+            instance = load_instance(path)
+        instances.append((name, instance))
 
-    with open(csv_filename, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(all_results)
+    config = config if config is not None else load_config()
+    if trace_file is not None:
+        timing = {**(timing or DEFAULT_TIMING), 'trace': True}
+    jobs, keys, rows = [], [], []
+    for graph_num, (name, instance) in enumerate(instances, 1):
+        for algorithm in planned_algorithms(len(instance), algorithms, config):
+            seed = job_seed(0, len(instance), name, algorithm)
+            params = job_params(algorithm, {}, config)
+            key, hit = cached_row(cache, instance, algorithm, seed, params)
+            if hit is not None:
+                rows.append(dict(hit, graph_num=graph_num))
+                continue
+            jobs.append((instance, graph_num, len(instance), algorithm, seed, 0, False, timing, config, params))
+            keys.append(key)
 
-    print(f"✓ Results saved to {csv_filename}")
+    if workers > 1 and jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            solved = list(executor.map(run_budgeted_job, *zip(*jobs)))
+    else:
+        solved = [run_budgeted_job(*job) for job in jobs]
+    traces = [row.pop('trace', None) for row in solved]
+    for key, row in zip(keys, solved):
+        cache_row(cache, key, row)
 
+    for row in rows + solved:
+        row.update(mode='tsplib', instance_id=instances[row['graph_num'] - 1][0])
+        print(f"  {row['instance_id']} {row['algorithm']}: {describe(row)}")
+    if trace_file is not None:
+        append_traces(trace_file, [trace_record(row, trace) for row, trace in zip(solved, traces)
+                                   if trace is not None])
+    rows += solved
+
+    from results_store import append_results, new_run_id
+    run_id = run_id or new_run_id()
+    append_results(results_dir, run_id, rows)
+    print(f"✓ Results saved to {results_dir} (run {run_id})")
 
-if __name__ == "__main__":
-    run_benchmark(num_graphs=100, num_nodes=5)
-    run_benchmark(num_graphs=100, num_nodes=6)
-    run_benchmark(num_graphs=100, num_nodes=7)
-    run_benchmark(num_graphs=100, num_nodes=8)
-    run_benchmark(num_graphs=100, num_nodes=9)
-    run_benchmark(num_graphs=100, num_nodes=10)
-    run_benchmark(num_graphs=100, num_nodes=12)
-    run_benchmark(num_graphs=100, num_nodes=13)
-    run_benchmark(num_graphs=100, num_nodes=15)
-    run_benchmark(num_graphs=100, num_nodes=17)
-    run_benchmark(num_graphs=100, num_nodes=18)
-    run_benchmark(num_graphs=100, num_nodes=20)
-    run_benchmark(num_graphs=100, num_nodes=22)
-    run_benchmark(num_graphs=100, num_nodes=23)
-    run_benchmark(num_graphs=100, num_nodes=25)
-    run_benchmark(num_graphs=100, num_nodes=27)
-    run_benchmark(num_graphs=100, num_nodes=28)
-    run_benchmark(num_graphs=100, num_nodes=30)
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark TSP algorithms on generated graphs")
+    parser.add_argument("--plan", help="benchmark plan (JSON, TOML or YAML), overrides the graph options below")
+    parser.add_argument("--shard", default="1/1", help="run only shard I of K of the plan's jobs, e.g. 2/4")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for (graph, algorithm) jobs")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for graph generation and solvers")
+    parser.add_argument("--graphs", type=int, default=100, help="graphs per size")
+    parser.add_argument("--sizes", type=int, nargs='+', help="graph sizes (default: the plans/default.json sizes)")
+    parser.add_argument("--generator", default='integer', choices=['integer', *INSTANCE_MODES],
+                        help="instance generator mode")
+    parser.add_argument("--algorithms", nargs='+', choices=list(SOLVERS),
+                        help="run only these algorithms (default: the plans/default.json ones)")
+    parser.add_argument("--store", help="directory of stored instances, generated once and memory-mapped afterwards")
+    parser.add_argument("--tsplib", nargs='+', metavar='FILE', help="run the solvers on TSPLIB files instead")
+    parser.add_argument("--results", default=RESULTS_DIR, help="results store directory")
+    parser.add_argument("--warmup", type=int, default=0, help="untimed calls before measuring each job")
+    parser.add_argument("--repeat", type=int, default=1, help="timed calls per job, the median is reported")
+    parser.add_argument("--min-time", type=float, default=0.0,
+                        help="keep repeating fast jobs until this many seconds were measured")
+    parser.add_argument("--memory", action='store_true', help="measure peak memory with tracemalloc (one extra call)")
+    parser.add_argument("--trace", metavar='FILE',
+                        help="record convergence traces and hot-path counters to this JSON-lines file "
+                             "(one extra call per job, bypasses --cache)")
+    parser.add_argument("--config", default=CONFIG_FILE, help="time/memory budgets per algorithm")
+    parser.add_argument("--cache", nargs='?', const=CACHE_FILE, metavar='FILE',
+                        help=f"reuse the rows of identical jobs from this solution cache (default file: {CACHE_FILE}); "
+                             "cached rows keep the times measured when they were stored")
+    args = parser.parse_args()
+    config = load_config(args.config)
+    # off unless asked for, the times of a cached row come from another run; a cached row has no trace to record
+    cache = SolutionCache(args.cache) if args.cache and not args.trace else None
+    timing = {'warmup': args.warmup, 'repeat': args.repeat, 'min_time': args.min_time, 'memory': args.memory}
 
+    # every size of this invocation shares one run id
+    from results_store import new_run_id
+    run_id = new_run_id()
+    if args.tsplib:
+        run_tsplib(args.tsplib, workers=args.workers, algorithms=args.algorithms, store=args.store, run_id=run_id,
+                   results_dir=args.results, timing=timing, config=config, cache=cache, trace_file=args.trace)
+        raise SystemExit
 
+    if args.plan:
+        plan = load_plan(args.plan)
+        timing = plan.get('timing', timing)
+    else:
+        plan = load_plan(DEFAULT_PLAN)
+        plan.update(generator=args.generator, graphs=args.graphs, seed=args.seed,
+                    algorithms=args.algorithms or plan['algorithms'], sizes=args.sizes or plan['sizes'])
+        if args.generator != 'integer':
+            plan['name'] = f"default_{args.generator}"
 
+    shard_index, shard_count = (int(part) for part in args.shard.split('/'))
+    run_plan(plan, workers=args.workers, store=args.store, run_id=run_id, results_dir=args.results, timing=timing,
+             config=config, shard_index=shard_index - 1, shard_count=shard_count, cache=cache, trace_file=args.trace)
@@ -0,0 +1,106 @@
+import itertools
+import numpy as np
+import matplotlib.pyplot as plt
+
+# the plots of analyze_benchmarks, kept apart so tables never pay for importing matplotlib
+
+
+def plot_interval(stats_df, mean_col, ci_col, color):
+    # shaded confidence band around a mean line, when the table has one
+    if ci_col not in stats_df.columns:
+        return
+    data = stats_df[['num_nodes', mean_col, ci_col]].dropna()
+    if not data.empty:
+        plt.fill_between(data['num_nodes'], (data[mean_col] - data[ci_col]).clip(lower=1e-9),
+                         data[mean_col] + data[ci_col], color=color, alpha=0.15, linewidth=0)
+
+def plot_runtime_vs_nodes(stats_df, output_file='runtime_vs_nodes.png', dpi=300):
+    plt.figure(figsize=(12, 7))
+
+    algorithms = [col[:-len('_avg_time')] for col in stats_df.columns if col.endswith('_avg_time')]
+    colors = itertools.cycle(['#e74c3c', '#34495e', '#1abc9c', '#3498db', '#2ecc71', '#f39c12', '#d35400', '#9b59b6', '#16a085', '#7f8c8d', '#c0392b'])
+    markers = itertools.cycle(['o', 'P', 'X', 's', '^', 'D', 'd', 'v', '*', 'h', '<'])
+
+    for algo, color, marker in zip(algorithms, colors, markers):
+        time_col = f'{algo}_avg_time'
+
+        if time_col in stats_df.columns:
+            data = stats_df[['num_nodes', time_col]].dropna()
+
+            if not data.empty:
+                plt.plot(data['num_nodes'], data[time_col],
+                        marker=marker, color=color, linewidth=2, markersize=8,
+                        label=algo.replace('_', ' ').title())
+                plot_interval(stats_df, time_col, f'{algo}_time_ci', color)
+
+    plt.xlabel('Liczba węzłów', fontsize=12, fontweight='bold')
+    plt.ylabel('Średni czas (s)', fontsize=12, fontweight='bold')
+    plt.title('Średni czas vs liczba węzłów', fontsize=14, fontweight='bold')
+    plt.legend(fontsize=10)
+    plt.grid(True, alpha=0.3)
+    plt.yscale('log')
+    plt.tight_layout()
+
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    print(f"\n✓ Saved runtime plot to {output_file}")
+    plt.close()
+
+def plot_weight_vs_nodes(stats_df, output_file='weight_vs_nodes.png', dpi=300):
+    plt.figure(figsize=(12, 7))
+
+    algorithms = [col[:-len('_avg_time')] for col in stats_df.columns if col.endswith('_avg_time')]
+    colors = itertools.cycle(['#e74c3c', '#34495e', '#1abc9c', '#3498db', '#2ecc71', '#f39c12', '#d35400', '#9b59b6', '#16a085', '#7f8c8d', '#c0392b'])
+    markers = itertools.cycle(['o', 'P', 'X', 's', '^', 'D', 'd', 'v', '*', 'h', '<'])
+
+    for algo, color, marker in zip(algorithms, colors, markers):
+        weight_col = f'{algo}_avg_weight'
+
+        if weight_col in stats_df.columns:
+            # Filter out NaN values
+            data = stats_df[['num_nodes', weight_col]].dropna()
+
+            if not data.empty:
+                plt.plot(data['num_nodes'], data[weight_col],
+                        marker=marker, color=color, linewidth=2, markersize=8,
+                        label=algo.replace('_', ' ').title())
+                plot_interval(stats_df, weight_col, f'{algo}_weight_ci', color)
+
+    plt.xlabel('Liczba węzłów', fontsize=12, fontweight='bold')
+    plt.ylabel('Średnia waga ścieżki', fontsize=12, fontweight='bold')
+    plt.title('Średnia waga ścieżki vs liczba węzłów', fontsize=14, fontweight='bold')
+    plt.legend(fontsize=10)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    print(f"✓ Saved weight plot to {output_file}")
+    plt.close()
+
+def plot_time_to_target(runs, gap, output_file='time_to_target.png', dpi=300):
+    # empirical distribution of the time to target per algorithm: the share of runs that got within gap % of
+    # the best known weight by a given time; runs that never did keep a curve below 1
+    plt.figure(figsize=(12, 7))
+
+    colors = itertools.cycle(['#e74c3c', '#34495e', '#1abc9c', '#3498db', '#2ecc71', '#f39c12', '#d35400', '#9b59b6', '#16a085', '#7f8c8d', '#c0392b'])
+    for (label, data), color in zip(runs.groupby('label', sort=True), colors):
+        seconds = np.sort(data['time_to_target'].dropna().to_numpy())
+        if len(seconds) == 0:
+            continue
+        probability = (np.arange(1, len(seconds) + 1) - 0.5) / len(data)
+        # rising from 0 at the first hit, with a marker per run so a single hit still shows
+        plt.step(np.concatenate([seconds[:1], seconds]), np.concatenate([[0], probability]), where='post',
+                 color=color, linewidth=2, label=f"{label.replace('_', ' ').title()} ({len(seconds)}/{len(data)})")
+        plt.plot(seconds, probability, 'o', color=color, markersize=5)
+
+    plt.xlabel('Czas (s)', fontsize=12, fontweight='bold')
+    plt.ylabel('Prawdopodobieństwo osiągnięcia celu', fontsize=12, fontweight='bold')
+    plt.title(f'Czas do celu (≤ {gap:g}% powyżej najlepszej znanej wagi)', fontsize=14, fontweight='bold')
+    plt.legend(fontsize=10)
+    plt.grid(True, alpha=0.3)
+    plt.xscale('log')
+    plt.ylim(0, 1.02)
+    plt.tight_layout()
+
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    print(f"✓ Saved time-to-target plot to {output_file}")
+    plt.close()
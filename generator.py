@@ -1,11 +1,102 @@
-import networkx as nx
+import numpy as np
 import random
+from distance_matrix import DistanceMatrix
+
+
+def euclidean_instance(num_nodes, rng, scale=100.0):
+    points = rng.uniform(0, scale, size=(num_nodes, 2))
+    return DistanceMatrix.from_points(points)
+
+
+def clustered_instance(num_nodes, rng, scale=100.0, clusters=None):
+    # DIMACS-style clustered layout: gaussian blobs around uniformly placed centers
+    clusters = clusters or max(1, num_nodes // 100)
+    centers = rng.uniform(0, scale, size=(clusters, 2))
+    spread = scale / np.sqrt(clusters) / 4
+    points = centers[rng.integers(0, clusters, size=num_nodes)] + rng.normal(0, spread, size=(num_nodes, 2))
+    return DistanceMatrix.from_points(points)
+
+
+def closure_instance(num_nodes, rng, low=1, high=10, degree=4, block_size=1024):
+    # shortest paths over a sparse random graph with integer weights low..high: a random cycle keeps it
+    # connected and every city adds `degree` random edges, so distances grow with the number of hops
+    # (the closure of a complete random graph collapses to 1s and 2s beyond ~150 cities)
+    cycle = rng.permutation(num_nodes)
+    frm = np.concatenate([cycle, np.repeat(np.arange(num_nodes), degree)])
+    to = np.concatenate([np.roll(cycle, -1), rng.integers(0, num_nodes, size=num_nodes * degree)])
+    weights = rng.integers(low, high + 1, size=len(frm))
+    # undirected edges without loops, the cheapest of any duplicates
+    lo, hi = np.minimum(frm, to), np.maximum(frm, to)
+    order = np.lexsort((weights, hi, lo))
+    lo, hi, weights = lo[order], hi[order], weights[order]
+    first = (lo != hi) & np.concatenate(([True], (lo[1:] != lo[:-1]) | (hi[1:] != hi[:-1])))
+    lo, hi, weights = lo[first], hi[first], weights[first]
+
+    matrix = np.empty((num_nodes, num_nodes), dtype=np.int32)
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import dijkstra
+    except ImportError:
+        # Floyd-Warshall, O(n^3)
+        dense = np.full((num_nodes, num_nodes), np.inf)
+        dense[lo, hi] = dense[hi, lo] = weights
+        np.fill_diagonal(dense, 0)
+        for k in range(num_nodes):
+            np.minimum(dense, dense[:, k, None] + dense[None, k, :], out=dense)
+        matrix[:] = dense
+        return DistanceMatrix.from_array(matrix)
+
+    # one Dijkstra per city, in row blocks so only a block of float64 distances exists at a time
+    graph = csr_matrix((weights.astype(np.float64), (lo, hi)), shape=(num_nodes, num_nodes))
+    for start in range(0, num_nodes, block_size):
+        matrix[start:start + block_size] = dijkstra(graph, directed=False,
+                                                    indices=np.arange(start, min(start + block_size, num_nodes)))
+    return DistanceMatrix.from_array(matrix)
+
+
+INSTANCE_MODES = {
+    'euclidean': euclidean_instance,
+    'clustered': clustered_instance,
+    'closure': closure_instance,
+}
+
 
 class Generator:
-    def __init__(self, nodes):
+    # mode 'integer' is the original edge-by-edge generator with weights 1-10,
+    # the other modes build a guaranteed-metric instance in one go (euclidean and
+    # clustered keep the points and compute the matrix on first use)
+    def __init__(self, nodes, mode='integer', seed=None, **params):
         self.max_edge_retries = 50  # max retries per edge before backtracking
         self.max_node_retries = 10   # max retries per node before removing it
-        self.graph = self.generate(nodes)
+        self.mode = mode
+        self.seed = seed
+        self.random = random.Random(seed) if seed is not None else random
+        self._graph = None
+        self._instance = None
+
+        if mode == 'integer':
+            self.graph = self.generate(nodes)
+        elif mode in INSTANCE_MODES:
+            self._instance = INSTANCE_MODES[mode](nodes, np.random.default_rng(seed), **params)
+        else:
+            raise ValueError(f"Unknown generator mode: {mode}")
+
+    @property
+    def graph(self):
+        # matrix modes only build the networkx graph when somebody asks for it
+        if self._graph is None and self._instance is not None:
+            self._graph = self._instance.to_graph()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+
+    @property
+    def instance(self):
+        if self._instance is None:
+            self._instance = DistanceMatrix(self._graph)
+        return self._instance
 
     def check_triangle_with_edge(self, u, v, weight):
         # for each node w that is connected to both u and v
@@ -29,12 +120,13 @@ class Generator:
 
     def generate_edge_weight(self, u, v):
         for attempt in range(self.max_edge_retries):
-            weight = random.randint(1, 10)
+            weight = self.random.randint(1, 10)
             if self.check_triangle_with_edge(u, v, weight):
                 return weight
         return None
 
     def generate(self, num_nodes):
+        import networkx as nx
         self.graph = nx.Graph()
 
         # add nodes one by one
@@ -1,29 +1,142 @@
-import pygad
+import time
+import numpy as np
+from distance_matrix import as_distance_matrix, tour_cost
+import instrumentation
 
 
-def genetic(graph, source_node):
+def order_crossover(parents_a, parents_b, rng):
+    # OX on whole batches: keep a[i:j], fill the rest with b's cities in b's order starting after j
+    count, n = parents_a.shape
+    rows = np.arange(count)[:, None]
+    positions = np.arange(n)[None, :]
 
-    nodes = list(graph.nodes())
+    cuts = np.sort(rng.integers(0, n + 1, size=(count, 2)), axis=1)
+    i, j = cuts[:, :1], cuts[:, 1:]
+    in_segment = (positions >= i) & (positions < j)
+
+    kept = np.zeros((count, n), dtype=bool)
+    kept[rows, parents_a] = in_segment
+
+    rotated = np.take_along_axis(parents_b, (j + positions) % n, axis=1)
+    order = np.argsort(kept[rows, rotated], axis=1, kind='stable')
+    fill = np.take_along_axis(rotated, order, axis=1)
+
+    children = parents_a.copy()
+    fill_positions = (j + positions) % n
+    fill_mask = positions < n - (j - i)
+    children[np.broadcast_to(rows, (count, n))[fill_mask], fill_positions[fill_mask]] = fill[fill_mask]
+    return children
+
+
+def inversion_mutation(population, rate, rng):
+    # reverse a random slice in a `rate` fraction of the rows
+    count, n = population.shape
+    positions = np.arange(n)[None, :]
+
+    cuts = np.sort(rng.integers(0, n, size=(count, 2)), axis=1)
+    i, j = cuts[:, :1], cuts[:, 1:]
+    mutate = rng.random((count, 1)) < rate
+    in_slice = (positions >= i) & (positions <= j) & mutate
+
+    index = np.where(in_slice, i + j - positions, positions)
+    return np.take_along_axis(population, index, axis=1)
+
+
+def tournament(costs, count, size, rng):
+    contestants = rng.integers(0, len(costs), size=(count, size))
+    winners = np.argmin(costs[contestants], axis=1)
+    return contestants[np.arange(count), winners]
+
+
+def genetic(graph, source_node, num_generations=1000, sol_per_pop=200, num_parents_mating=20, keep_elitism=5,
+            tournament_size=3, mutation_rate=0.2, stagnation=100, seed=None, engine='native', time_limit=None):
+
+    if engine == 'pygad':
+        return genetic_pygad(graph, source_node, num_generations, sol_per_pop, num_parents_mating, keep_elitism)
+
+    instance = as_distance_matrix(graph)
+    num_nodes = len(instance)
+
+    # draw from the global numpy state when no seed is given so np.random.seed() still pins runs
+    rng = np.random.default_rng(seed if seed is not None else np.random.randint(2 ** 31))
+
+    # the whole population is one (sol_per_pop, num_nodes) array of permutations
+    population = np.argsort(rng.random((sol_per_pop, num_nodes)), axis=1)
+    costs = tour_cost(instance, population)
+
+    # generation 0 of the trace is the random population, every tour scored costs num_nodes lookups
+    trace = instrumentation.current()
+    if trace is not None:
+        trace.iteration(costs.min(), distance_lookups=costs.size * num_nodes, moves_evaluated=costs.size)
+
+    best_cost = costs.min()
+    stale = 0
+    # anytime: past the deadline the best tour of the current population is returned
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+    for _ in range(num_generations):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        order = np.argsort(costs, kind='stable')
+        elite = population[order[:keep_elitism]]
+
+        parents = population[tournament(costs, num_parents_mating, tournament_size, rng)]
+        offspring_count = sol_per_pop - keep_elitism
+        pairs = rng.integers(0, num_parents_mating, size=(offspring_count, 2))
+        offspring = order_crossover(parents[pairs[:, 0]], parents[pairs[:, 1]], rng)
+        offspring = inversion_mutation(offspring, mutation_rate, rng)
+
+        population = np.concatenate([elite, offspring])
+        costs = tour_cost(instance, population)
+        if trace is not None:
+            trace.iteration(costs.min(), distance_lookups=costs.size * num_nodes, moves_evaluated=offspring_count)
+
+        # early stop once the best tour has not improved for `stagnation` generations
+        if costs.min() < best_cost:
+            best_cost = costs.min()
+            stale = 0
+        else:
+            stale += 1
+            if stale >= stagnation:
+                break
+
+    solution = population[np.argmin(costs)]
+    weight = tour_cost(instance, solution).item()
+
+    path = instance.labels(solution)
+    if source_node in path:
+        index = path.index(source_node)
+        path = path[index:] + path[:index]
+
+    path.append(path[0])
+
+    return weight, path
+
+
+def genetic_pygad(graph, source_node, num_generations=1000, sol_per_pop=200, num_parents_mating=20, keep_elitism=5):
+    # the original pygad setup, kept for comparison with earlier benchmark results
+    import pygad
+
+    instance = as_distance_matrix(graph)
+    nodes = instance.nodes
     num_nodes = len(nodes)
 
     def calculate_path_weight(path):
-        distance = 0
-        for i in range(len(path) - 1):
-            u, v = nodes[path[i]], nodes[path[i + 1]]
-            distance += graph[u][v]['weight']
-        distance += graph[nodes[path[-1]]][nodes[path[0]]]['weight']
-        return distance
+        return tour_cost(instance, np.asarray(path, dtype=np.intp)).item()
 
-    def fitness_function(ga_instance, solution, solution_idx):
-        return 1.0 / (calculate_path_weight(solution) + 1e-6)
+    # the whole batch of solutions is scored in one gather-and-sum
+    def fitness_function(ga_instance, solutions, solution_indices):
+        costs = tour_cost(instance, np.asarray(solutions, dtype=np.intp))
+        return 1.0 / (costs + 1e-6)
 
     gene_space = list(range(num_nodes))
 
     ga_instance = pygad.GA(
-        num_generations=1000,
-        num_parents_mating=20,
+        num_generations=num_generations,
+        num_parents_mating=num_parents_mating,
         fitness_func=fitness_function,
-        sol_per_pop=200,
+        fitness_batch_size=sol_per_pop,
+        sol_per_pop=sol_per_pop,
         num_genes=num_nodes,
         gene_type=int,
         gene_space=gene_space,
@@ -33,7 +146,7 @@ def genetic(graph, source_node):
         mutation_percent_genes=10,
         allow_duplicate_genes=False,
         keep_parents=5,
-        keep_elitism=5,
+        keep_elitism=keep_elitism,
         suppress_warnings=True
     )
 
@@ -0,0 +1,96 @@
+import numpy as np
+from distance_matrix import as_distance_matrix, exact_matrix, tour_cost
+
+
+def subsets_by_size(m):
+    # all bitmasks over m cities grouped by popcount, ascending inside each group
+    masks = np.arange(1 << m, dtype=np.int64)
+    popcount = np.zeros(1 << m, dtype=np.int8)
+    for b in range(m):
+        popcount += ((masks >> b) & 1).astype(np.int8)
+
+    order = np.argsort(popcount, kind='stable')
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(popcount, minlength=m + 1))))
+    return [order[bounds[k]:bounds[k + 1]] for k in range(m + 1)]
+
+
+def held_karp(graph, source_node=0, low_memory=None):
+
+    instance = as_distance_matrix(graph)
+    matrix = exact_matrix(instance)
+    n = len(instance)
+    start = instance.index[source_node]
+
+    if n == 1:
+        return instance.weight(source_node, source_node), [source_node, source_node]
+
+    # DP runs over the m cities other than the fixed start
+    others = np.array([i for i in range(n) if i != start])
+    m = n - 1
+    dist = matrix[np.ix_(others, others)]
+
+    # the full cost table is 2^m x m float64, switch to per-layer costs for big instances
+    if low_memory is None:
+        low_memory = n > 16
+
+    layers = subsets_by_size(m)
+    parent = np.full((1 << m, m), -1, dtype=np.int8)
+
+    if low_memory:
+        rank = np.zeros(1 << m, dtype=np.int32)
+        rank[layers[1]] = np.arange(len(layers[1]))
+        cost = np.full((len(layers[1]), m), np.inf)
+        cost[rank[1 << np.arange(m)], np.arange(m)] = matrix[start, others]
+    else:
+        cost = np.full((1 << m, m), np.inf)
+        cost[1 << np.arange(m), np.arange(m)] = matrix[start, others]
+
+    for k in range(2, m + 1):
+        masks = layers[k]
+
+        if low_memory:
+            previous = cost
+            rank[masks] = np.arange(len(masks))
+            cost = np.full((len(masks), m), np.inf)
+
+        for j in range(m):
+            sel = masks[(masks >> j) & 1 == 1]
+            prev = sel ^ (1 << j)
+
+            # candidates[r, i]: reach subset prev ending at i, then step i -> j
+            if low_memory:
+                candidates = previous[rank[prev]] + dist[:, j]
+            else:
+                candidates = cost[prev] + dist[:, j]
+
+            best = np.argmin(candidates, axis=1)
+            target = rank[sel] if low_memory else sel
+            cost[target, j] = candidates[np.arange(len(sel)), best]
+            parent[sel, j] = best
+
+    full = (1 << m) - 1
+    final = cost[rank[full]] if low_memory else cost[full]
+    final = final + matrix[others, start]
+    last = int(np.argmin(final))
+    weight = final[last]
+
+    # walk the predecessor table back from the full subset
+    order = []
+    mask = full
+    j = last
+    while j >= 0:
+        order.append(others[j])
+        previous_j = int(parent[mask, j])
+        mask ^= 1 << j
+        j = previous_j
+
+    tour = [start] + order[::-1]
+    path = instance.labels(tour + [start])
+
+    if instance.coords is None and np.issubdtype(instance.matrix.dtype, np.integer):
+        weight = int(round(weight))
+    else:
+        # scored like every other solver scores the same tour, not in DP order
+        weight = tour_cost(instance, tour).item()
+
+    return weight, path
@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+import numpy as np
+from distance_matrix import DistanceMatrix
+
+
+def instance_name(mode, num_nodes, graph_num, seed):
+    return f"{mode}_{num_nodes}_{graph_num}_{seed}"
+
+
+def instance_path(store, mode, num_nodes, graph_num, seed):
+    return Path(store) / instance_name(mode, num_nodes, graph_num, seed)
+
+
+def save_instance(instance, path, **metadata):
+    # <path>.npy holds the points of a geometric instance or the distance matrix, <path>.json the rest
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    kind = 'points' if instance.coords is not None else 'matrix'
+    data = instance.coords if kind == 'points' else instance.matrix
+    np.save(path.with_suffix('.npy'), data)
+
+    meta = {'kind': kind, 'size': len(instance), 'dtype': str(data.dtype), **metadata}
+    if instance.nodes != list(range(len(instance))):
+        meta['nodes'] = instance.nodes
+    path.with_suffix('.json').write_text(json.dumps(meta, indent=2))
+    return path
+
+
+def load_instance(path, mmap=True):
+    # matrices are memory-mapped read-only, so every process solving the instance shares the same pages
+    path = Path(path)
+    meta = read_metadata(path)
+    data_file = path.with_suffix('.npy')
+
+    if meta['kind'] == 'points':
+        instance = DistanceMatrix.from_points(np.load(data_file), meta.get('nodes'))
+    else:
+        instance = DistanceMatrix.from_array(np.load(data_file, mmap_mode='r' if mmap else None), meta.get('nodes'))
+        if mmap:
+            instance._source = str(data_file)
+
+    return instance
+
+
+def read_metadata(path):
+    return json.loads(Path(path).with_suffix('.json').read_text())
+
+
+def has_instance(path):
+    path = Path(path)
+    return path.with_suffix('.json').exists() and path.with_suffix('.npy').exists()
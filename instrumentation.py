@@ -0,0 +1,111 @@
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# the trace solvers report into; without one a solver pays a single lookup per call and
+# one `is not None` test per iteration
+_active = ContextVar('trace', default=None)
+
+# counter names shared by the solvers
+DISTANCE_LOOKUPS = 'distance_lookups'
+MOVES_EVALUATED = 'moves_evaluated'
+
+
+def current():
+    return _active.get()
+
+
+class Trace:
+    # one solver call: the best cost after every iteration (and when it was reached) plus named
+    # hot-path counters; solvers call iteration() once per generation / colony step / kick
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.elapsed = []
+        self.best = []
+        self.improvements = []
+        self.counters = {}
+        self.total_time = None
+
+    def iteration(self, best_cost, **counts):
+        now = time.perf_counter() - self.start
+        best_cost = float(best_cost)
+        if self.best and best_cost >= self.best[-1]:
+            best_cost = self.best[-1]
+        else:
+            self.improvements.append((len(self.best) + 1, now, best_cost))
+        self.elapsed.append(now)
+        self.best.append(best_cost)
+        for name, amount in counts.items():
+            self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def counted(self, lookup, name=DISTANCE_LOOKUPS):
+        # wraps a distance callable (e.g. matrix.item) so every call is counted
+        counters = self.counters
+
+        def counted_lookup(*args):
+            counters[name] = counters.get(name, 0) + 1
+            return lookup(*args)
+        return counted_lookup
+
+    def finish(self):
+        if self.total_time is None:
+            self.total_time = time.perf_counter() - self.start
+
+    @property
+    def iterations(self):
+        return len(self.best)
+
+    @property
+    def time_to_best(self):
+        return self.improvements[-1][1] if self.improvements else None
+
+    def summary(self):
+        # the per-row part: improvements only, the full per-iteration series goes to the trace file
+        return {
+            'iterations': self.iterations,
+            'iterations_to_best': self.improvements[-1][0] if self.improvements else None,
+            'time_to_best': self.time_to_best,
+            'total_time': self.total_time,
+            'counters': dict(self.counters),
+            'convergence': [list(point) for point in self.improvements],
+        }
+
+    def to_dict(self):
+        return {**self.summary(), 'elapsed': self.elapsed, 'best': self.best}
+
+
+@contextmanager
+def recording(trace=None):
+    # solvers called inside report into `trace` (a new one by default)
+    trace = trace if trace is not None else Trace()
+    token = _active.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _active.reset(token)
+
+
+def time_to_target(convergence, target):
+    # seconds until the best cost first got within target, None if it never did
+    for _, elapsed, cost in convergence:
+        if cost <= target:
+            return elapsed
+    return None
+
+
+def append_traces(path, records):
+    # JSON lines, one solver call each: the job columns plus Trace.to_dict()
+    with open(path, 'a') as file:
+        for record in records:
+            file.write(json.dumps(record, default=lambda o: o.item() if hasattr(o, 'item') else str(o)) + "\n")
+
+
+def read_traces(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
@@ -0,0 +1,164 @@
+import random
+import time
+from collections import deque
+from distance_matrix import as_distance_matrix, tour_cost
+from local_search import Tour, improve_or_opt, local_search
+from neighbour_index import distance_function, neighbour_lists
+from nearest_neighbour import nearest_neighbour
+import instrumentation
+
+
+def next_along(tour, t1, t2, t3):
+    # t4 is the tour neighbour of t3 that keeps the 2-opt move t1-t2 / t3-t4 valid
+    return tour.succ(t3) if tour.succ(t2) == t1 else tour.pred(t3)
+
+
+def lk_chain(tour, dist, candidates, t1, t2, t3, max_depth):
+    # sequential chain of 2-opt moves (Or-opt style LK): break t1-t2, add t2-t3, break t3-t4,
+    # close with t4-t1 and continue from t4 while the partial gain stays positive
+    moves = []
+    best_gain = 1e-9
+    best_length = 0
+    touched = [t1, t2]
+    gain = dist(t1, t2)
+    added = set()
+    removed = {frozenset((t1, t2))}
+
+    for depth in range(max_depth):
+        if depth > 0:
+            # deeper levels take the single most promising candidate
+            t3 = None
+            best_score = None
+            for candidate in candidates[t2]:
+                g1 = gain - dist(t2, candidate)
+                if g1 <= 0:
+                    break
+                if candidate in (t1, tour.succ(t2), tour.pred(t2)):
+                    continue
+                t4 = next_along(tour, t1, t2, candidate)
+                if t4 in (t1, t2) or frozenset((candidate, t4)) in added or frozenset((t2, candidate)) in removed:
+                    continue
+                score = dist(candidate, t4) - dist(t2, candidate)
+                if best_score is None or score > best_score:
+                    t3, best_score = candidate, score
+            if t3 is None:
+                break
+
+        t4 = next_along(tour, t1, t2, t3)
+        g1 = gain - dist(t2, t3)
+        tour.two_opt_move(t2, t1, t3, t4)
+        moves.append((t2, t1, t3, t4))
+        added.add(frozenset((t2, t3)))
+        removed.add(frozenset((t3, t4)))
+        touched += [t3, t4]
+
+        gain = g1 + dist(t3, t4)
+        closed_gain = gain - dist(t4, t1)
+        if closed_gain > best_gain:
+            best_gain = closed_gain
+            best_length = len(moves)
+
+        t2 = t4
+
+    # roll back everything after the best closing point
+    for a, b, c, d in reversed(moves[best_length:]):
+        tour.two_opt_move(a, c, b, d)
+
+    return touched if best_length else None
+
+
+def lk_step(tour, dist, candidates, t1, max_depth):
+    for t2 in (tour.succ(t1), tour.pred(t1)):
+        d12 = dist(t1, t2)
+        for t3 in candidates[t2]:
+            if dist(t2, t3) >= d12:
+                break
+            if t3 in (t1, tour.succ(t2), tour.pred(t2)):
+                continue
+            t4 = next_along(tour, t1, t2, t3)
+            if t4 in (t1, t2):
+                continue
+
+            touched = lk_chain(tour, dist, candidates, t1, t2, t3, max_depth)
+            if touched is not None:
+                return touched
+    return None
+
+
+def optimize(tour, dist, candidates, queue, max_depth):
+    # LK chains plus Or-opt from every city whose don't-look bit is off, returns the number of moves made
+    moves = 0
+    active = [False] * tour.n
+    for city in queue:
+        active[city] = True
+
+    while queue:
+        t1 = queue.popleft()
+        active[t1] = False
+
+        touched = lk_step(tour, dist, candidates, t1, max_depth)
+        if touched is None:
+            touched = improve_or_opt(tour, dist, candidates, t1)
+
+        if touched is not None:
+            moves += 1
+            for city in touched:
+                if not active[city]:
+                    active[city] = True
+                    queue.append(city)
+    return moves
+
+
+def double_bridge(order):
+    # classic 4-opt kick: A B C D -> A C B D
+    n = len(order)
+    i, j, k = sorted(random.sample(range(1, n), 3))
+    kicked = [order[i - 1], order[i], order[j - 1], order[j], order[k - 1], order[k]]
+    return order[:i] + order[j:k] + order[i:j] + order[k:], kicked
+
+
+def lin_kernighan(graph, source_node, neighbours=8, max_depth=6, max_iterations=100, time_limit=10.0):
+
+    instance = as_distance_matrix(graph)
+    n = len(instance)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+    _, path = nearest_neighbour(instance, source_node)
+    if n < 8:
+        return local_search(instance, path)
+
+    dist = distance_function(instance)
+    candidates = neighbour_lists(instance, neighbours).tolist()
+    trace = instrumentation.current()
+    if trace is not None:
+        dist = trace.counted(dist)
+
+    tour = Tour(instance.indices(path[:-1]))
+    moves = optimize(tour, dist, candidates, deque(tour.order), max_depth)
+    best_order = list(tour.order)
+    best_weight = tour_cost(instance, best_order).item()
+    # iteration 1 of the trace is the first local optimum, then one per kick
+    if trace is not None:
+        trace.iteration(best_weight, moves_applied=moves)
+
+    # iterated LK: kick the best tour with a double bridge, re-optimize around the kick
+    for _ in range(max_iterations):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+
+        order, kicked = double_bridge(best_order)
+        tour = Tour(order)
+        moves = optimize(tour, dist, candidates, deque(dict.fromkeys(kicked)), max_depth)
+
+        weight = tour_cost(instance, tour.order).item()
+        if weight < best_weight:
+            best_weight = weight
+            best_order = list(tour.order)
+        if trace is not None:
+            trace.iteration(best_weight, moves_applied=moves)
+
+    path = instance.labels(best_order)
+    index = path.index(source_node)
+    path = path[index:] + path[:index] + [source_node]
+
+    return best_weight, path
@@ -0,0 +1,166 @@
+from collections import deque
+import numpy as np
+from distance_matrix import as_distance_matrix, tour_cost
+from neighbour_index import distance_function, neighbour_lists
+import instrumentation
+
+
+class Tour:
+    # array tour with a position index, 2-opt moves reverse the shorter side of the cycle
+    def __init__(self, order):
+        self.order = list(order)
+        self.n = len(self.order)
+        self.pos = [0] * self.n
+        for i, city in enumerate(self.order):
+            self.pos[city] = i
+
+    def succ(self, city):
+        return self.order[(self.pos[city] + 1) % self.n]
+
+    def pred(self, city):
+        return self.order[(self.pos[city] - 1) % self.n]
+
+    def reverse(self, first, last):
+        # reverse the path first -> last (following succ), or its complement if that is shorter
+        order, pos, n = self.order, self.pos, self.n
+        i, j = pos[first], pos[last]
+        length = (j - i) % n + 1
+        if 2 * length > n:
+            i, j = (j + 1) % n, (i - 1) % n
+            length = n - length
+        for _ in range(length // 2):
+            a, b = order[i], order[j]
+            order[i], order[j] = b, a
+            pos[b], pos[a] = i, j
+            i = (i + 1) % n
+            j = (j - 1) % n
+
+    def two_opt_move(self, t1, t2, t3, t4):
+        # drop edges {t1, t2} and {t3, t4}, add {t1, t3} and {t2, t4}
+        if self.succ(t1) == t2:
+            self.reverse(t2, t3)
+        else:
+            self.reverse(t3, t2)
+
+
+def improve_two_opt(tour, dist, candidates, queue, active):
+    # first-improvement 2-opt from city a over its candidate list, both tour directions
+    a = queue.popleft()
+    active[a] = False
+
+    for forward in (True, False):
+        b = tour.succ(a) if forward else tour.pred(a)
+        d_ab = dist(a, b)
+
+        for c in candidates[a]:
+            d_ac = dist(a, c)
+            if d_ac >= d_ab:
+                break
+
+            d = tour.succ(c) if forward else tour.pred(c)
+            if c == b or d == a:
+                continue
+
+            delta = d_ac + dist(b, d) - d_ab - dist(c, d)
+            if delta < -1e-9:
+                tour.two_opt_move(a, b, c, d)
+                return [a, b, c, d]
+
+    return None
+
+
+def improve_or_opt(tour, dist, candidates, a, max_segment=3):
+    # move the segment starting at a (1..3 cities) next to a candidate, in either orientation
+    n = tour.n
+    for length in range(1, min(max_segment, n - 3) + 1):
+        segment = [a]
+        for _ in range(length - 1):
+            segment.append(tour.succ(segment[-1]))
+        s1, s2 = segment[0], segment[-1]
+        p, nx = tour.pred(s1), tour.succ(s2)
+        removal_gain = dist(p, s1) + dist(s2, nx) - dist(p, nx)
+        if removal_gain <= 1e-9:
+            continue
+
+        inside = set(segment)
+        for end in (s1, s2):
+            for candidate in candidates[end]:
+                if candidate in inside:
+                    continue
+                for c, e in ((candidate, tour.succ(candidate)), (tour.pred(candidate), candidate)):
+                    if c in inside or e in inside or c == p or e == p:
+                        continue
+
+                    edge = dist(c, e)
+                    reversed_cost = dist(c, s2) + dist(s1, e) - edge
+                    forward_cost = dist(c, s1) + dist(s2, e) - edge
+                    if min(reversed_cost, forward_cost) - removal_gain < -1e-9:
+                        # segment insertion as a chain of 2-opt moves
+                        tour.two_opt_move(p, s1, c, e)
+                        tour.two_opt_move(p, c, nx, s2)
+                        if forward_cost < reversed_cost:
+                            tour.two_opt_move(c, s2, s1, e)
+                        return [p, nx, c, e, s1, s2]
+
+    return None
+
+
+def improve(dist, order, candidates, or_opt=True, max_moves=None):
+    # 2-opt and Or-opt driven by don't-look bits: only cities next to a changed edge are revisited
+    # dist: dist(a, b) callable, see neighbour_index.distance_function
+    tour = Tour(order)
+    if tour.n < 5:
+        return np.array(tour.order)
+
+    trace = instrumentation.current()
+    if trace is not None:
+        dist = trace.counted(dist)
+    candidates = candidates.tolist()
+    queue = deque(tour.order)
+    active = [True] * tour.n
+    moves = 0
+
+    while queue and (max_moves is None or moves < max_moves):
+        a = queue[0]
+        touched = improve_two_opt(tour, dist, candidates, queue, active)
+        if touched is None and or_opt:
+            touched = improve_or_opt(tour, dist, candidates, a)
+
+        if touched is not None:
+            moves += 1
+            for city in touched:
+                if not active[city]:
+                    active[city] = True
+                    queue.append(city)
+
+    if trace is not None:
+        trace.count('moves_applied', moves)
+    return np.array(tour.order)
+
+
+def local_search(graph, path, neighbours=10, or_opt=True, max_moves=None):
+
+    instance = as_distance_matrix(graph)
+    start = path[0]
+    order = instance.indices(path[:-1] if len(path) > 1 and path[-1] == path[0] else path)
+
+    candidates = neighbour_lists(instance, neighbours)
+    order = improve(distance_function(instance), order, candidates, or_opt, max_moves)
+    weight = tour_cost(instance, order).item()
+
+    path = instance.labels(order)
+    index = path.index(start)
+    path = path[index:] + path[:index] + [start]
+
+    return weight, path
+
+
+def with_local_search(solver, **options):
+    # wraps any (graph, source_node) -> (weight, path) solver with a local search pass
+    def solve(graph, source_node, **kwargs):
+        instance = as_distance_matrix(graph)
+        _, path = solver(instance, source_node, **kwargs)[:2]
+        return local_search(instance, path, **options)
+
+    solve.__name__ = f"{solver.__name__}_local_search"
+    return solve
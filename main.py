@@ -1,61 +1,48 @@
-from generator import Generator
-from christofides import christofides
-from brute_force import brute_force
-from nearest_neighbour import nearest_neighbour
-from genetic import genetic
-from ant_colony import ant_colony
-import time
-
-nodes = 7
-gen = Generator(nodes)
-graph = gen.graph
+import argparse
+import random
+from registry import get_solver
+from plans import job_params, load_config
+from solution_cache import CACHE_FILE, SolutionCache
+from benchmark import cached_row, cache_row, generate_instance, job_seed, run_job
+
+parser = argparse.ArgumentParser(description="Solve one generated graph with every solver")
+parser.add_argument("--nodes", type=int, default=7)
+parser.add_argument("--seed", type=int,
+                    help="base seed, the graph is graph #1 of benchmark.py --seed (default: a new random graph)")
+parser.add_argument("--cache", nargs='?', const=CACHE_FILE, metavar='FILE',
+                    help=f"reuse seeded results from this solution cache (default file: {CACHE_FILE})")
+args = parser.parse_args()
+
+nodes = args.nodes
+# graph, solver seeds and params derived like a benchmark job, so both share cache entries
+base_seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+graph = generate_instance(nodes, 1, base_seed)
+config = load_config()
+# a random graph is never seen twice, only seeded runs can be answered from the cache
+cache = SolutionCache(args.cache) if args.seed is not None and args.cache else None
 
 source_node = 0
 
-print("+++ Using Brute Force Algorithm +++")
-start_time = time.time()
-weight, path = brute_force(graph)
-elapsed_time = time.time() - start_time
-print("Approximate TSP path:", path)
-print("Total weight of the path:", weight)
-print(f"  ✓ Completed in {elapsed_time:.4f}s")
-
-print()
-
-print("+++ Using Christofides Algorithm +++")
-start_time = time.time()
-weight, path = christofides(graph, source_node)
-elapsed_time = time.time() - start_time
-print("Approximate TSP path:", path)
-print("Total weight of the path:", weight)
-print(f"  ✓ Completed in {elapsed_time:.4f}s")
-
-print()
-
-print("+++ Using Nearest Neighbour Heuristic +++")
-start_time = time.time()
-weight, path = nearest_neighbour(graph, source_node)
-elapsed_time = time.time() - start_time
-print("Approximate TSP path:", path)
-print("Total weight of the path:", weight)
-print(f"  ✓ Completed in {elapsed_time:.4f}s")
-
-print()
-
-print("+++ Using Genetic Algorithm +++")
-start_time = time.time()
-weight, path = genetic(graph, source_node)
-elapsed_time = time.time() - start_time
-print("Approximate TSP path:", path)
-print("Total weight of the path:", weight)
-print(f"  ✓ Completed in {elapsed_time:.4f}s")
-
-print()
-
-print("+++ Using Ant Colony Optimization +++")
-start_time = time.time()
-weight, path = ant_colony(graph, source_node)
-elapsed_time = time.time() - start_time
-print("Approximate TSP path:", path)
-print("Total weight of the path:", weight)
-print(f"  ✓ Completed in {elapsed_time:.4f}s")
+for i, name in enumerate(['brute_force', 'christofides', 'nearest_neighbour', 'genetic', 'ant_colony']):
+    solver = get_solver(name)
+    if i:
+        print()
+
+    print(f"+++ Using {solver.display_name} +++")
+    seed = job_seed(base_seed, nodes, 1, name)
+    params = job_params(name, {}, config)
+    key, cached = cached_row(cache, graph, name, seed, params)
+    row = cached
+    if row is None:
+        row = run_job(graph, 1, nodes, name, seed, source_node, params=params)
+        cache_row(cache, key, row)
+    if row['tour'] is None:
+        print(f"  ✗ Failed ({row['status']})")
+        continue
+    # rows hold the tour as instance indices without the closing node
+    path = graph.labels(row['tour'])
+    index = path.index(source_node)
+    path = path[index:] + path[:index] + [source_node]
+    print("Approximate TSP path:", path)
+    print("Total weight of the path:", row['weight'])
+    print(f"  ✓ Completed in {row['time']:.4f}s" + (" (cached)" if cached is not None else ""))
@@ -1,29 +1,171 @@
-def nearest_neighbour(graph, start):
-    visited = set()
-    path = []
-    current = start
-    weight = 0
+import numpy as np
+from distance_matrix import as_distance_matrix, tour_cost
+from neighbour_index import cKDTree, neighbour_lists, candidate_distances, distances_from
 
-    while len(visited) < len(graph):
-        visited.add(current)
-        path.append(current)
 
-        nearest = None
-        nearest_distance = float('inf')
+def nearest_neighbour(graph, start, neighbours=10):
+    instance = as_distance_matrix(graph)
+    n = len(instance)
+    first = instance.index[start]
 
-        for neighbour in graph[current].keys():
-            if neighbour not in visited and graph[current][neighbour]['weight'] < nearest_distance:
-                nearest = neighbour
-                nearest_distance = graph[current][neighbour]['weight']
+    path = [first]
+    visited = bytearray(n)
+    visited[first] = 1
+    # zero-copy boolean view of the same buffer for the vectorized fallback
+    visited_mask = np.frombuffer(visited, dtype=bool)
+    remaining = np.arange(n)
+    # geometric instances answer the fallback from a KD-tree over the unvisited points
+    use_tree = cKDTree is not None and not instance.is_dense
+    tree = None
 
-        if nearest is None:
-            break
+    if n > 1:
+        candidates = neighbour_lists(instance, neighbours)
+        distances = candidate_distances(instance, candidates).tolist()
+        complete = candidates.shape[1] == n - 1
+        candidates = candidates.tolist()
 
+    current = first
+    while len(path) < n:
+        nearest = -1
+
+        # first unvisited candidate; it is only trusted when strictly closer than the list's
+        # last entry, so ties resolve to the lowest index exactly like a full scan would
+        row = distances[current]
+        for position, city in enumerate(candidates[current]):
+            if not visited[city]:
+                if complete or row[position] < row[-1]:
+                    nearest = city
+                break
+
+        if nearest < 0 and use_tree:
+            if tree is None or 2 * (len(remaining) - (n - len(path))) > len(remaining):
+                # rebuild once more than half of the tree has been visited
+                remaining = remaining[~visited_mask[remaining]]
+                tree = cKDTree(instance.coords[remaining])
+            k = 8
+            while nearest < 0:
+                k = min(k, len(remaining))
+                _, found = tree.query(instance.coords[current], k=k)
+                found = remaining[np.atleast_1d(found)]
+                unvisited = found[~visited_mask[found]]
+                if len(unvisited):
+                    nearest = int(unvisited[0])
+                k *= 4
+
+        if nearest < 0:
+            # argmin over the still unvisited cities (kept sorted, so the lowest index wins ties)
+            remaining = remaining[~visited_mask[remaining]]
+            if len(remaining) == 0:
+                break
+            nearest = int(remaining[np.argmin(distances_from(instance, current, remaining))])
+
+        visited[nearest] = 1
+        path.append(nearest)
         current = nearest
-        weight += nearest_distance
 
-    weight += graph[current][start]['weight']
+    weight = tour_cost(instance, path).item()
+    path = instance.labels(path)
     index = path.index(start)
     path = path[index:] + path[:index] + [path[index]]
 
-    return weight, path
\ No newline at end of file
+    return weight, path
+
+
+def nearest_neighbour_tours(instance, starts, neighbours=10):
+    # grows one tour per start at the same time: row b of `tours` is the tour from starts[b]
+    n = len(instance)
+    starts = np.asarray(starts, dtype=np.intp)
+    batch = len(starts)
+    rows = np.arange(batch)
+
+    tours = np.empty((batch, n), dtype=np.intp)
+    visited = np.zeros((batch, n), dtype=bool)
+    tours[:, 0] = starts
+    visited[rows, starts] = True
+    if n == 1:
+        return tours
+
+    candidates = neighbour_lists(instance, neighbours)
+    distances = candidate_distances(instance, candidates)
+    complete = candidates.shape[1] == n - 1
+
+    current = starts
+    for step in range(1, n):
+        # same rule as the single-start walk: first unvisited candidate if it beats the list's last entry
+        options = candidates[current]
+        free = ~visited[rows[:, None], options]
+        position = np.argmax(free, axis=1)
+        found = free[rows, position]
+        if not complete:
+            row_distances = distances[current]
+            found &= row_distances[rows, position] < row_distances[:, -1]
+        nxt = options[rows, position]
+
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            # masked argmin over whole rows, only for the starts whose candidates ran out
+            if instance.is_dense:
+                full_rows = instance.matrix[current[missing]].astype(np.float64)
+            else:
+                # squared distances axis by axis, same order as the true distances without the sqrt
+                full_rows = np.zeros((len(missing), n))
+                for axis in instance.coords.T:
+                    diff = axis[current[missing], None] - axis[None, :]
+                    diff *= diff
+                    full_rows += diff
+            full_rows[visited[missing]] = np.inf
+            nxt[missing] = np.argmin(full_rows, axis=1)
+
+        tours[:, step] = nxt
+        visited[rows, nxt] = True
+        current = nxt
+
+    return tours
+
+
+def best_of_starts(instance, starts, neighbours=10, batch_size=256):
+    # costs of all starts and the best tour, computed batch by batch to bound the (batch, n) arrays
+    costs = np.empty(len(starts))
+    best_tour, best_cost = None, np.inf
+    for offset in range(0, len(starts), batch_size):
+        tours = nearest_neighbour_tours(instance, starts[offset:offset + batch_size], neighbours)
+        batch_costs = tour_cost(instance, tours)
+        costs[offset:offset + len(tours)] = batch_costs
+        best = int(np.argmin(batch_costs))
+        if batch_costs[best] < best_cost:
+            best_tour, best_cost = tours[best], batch_costs[best]
+    return costs, best_tour
+
+
+def nearest_neighbour_multistart(graph, source_node, starts=None, neighbours=10, batch_size=256, workers=1,
+                                 return_costs=False):
+
+    # starts: node labels to grow tours from (default: every node)
+    # workers: > 1 splits the starts over that many processes
+    # return_costs: also return a {start: tour weight} dict
+    instance = as_distance_matrix(graph)
+    start_labels = list(instance.nodes) if starts is None else list(starts)
+    start_indices = np.array(instance.indices(start_labels), dtype=np.intp)
+
+    if workers > 1 and len(start_indices) > batch_size:
+        from concurrent.futures import ProcessPoolExecutor
+        chunks = np.array_split(start_indices, workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(best_of_starts, [instance] * len(chunks), chunks,
+                                        [neighbours] * len(chunks), [batch_size] * len(chunks)))
+        costs = np.concatenate([chunk_costs for chunk_costs, _ in results])
+        tours = [tour for _, tour in results]
+        best_tour = tours[int(np.argmin([tour_cost(instance, tour) for tour in tours]))]
+    else:
+        costs, best_tour = best_of_starts(instance, start_indices, neighbours, batch_size)
+
+    weight = tour_cost(instance, best_tour).item()
+    path = instance.labels(best_tour)
+    if source_node in path:
+        index = path.index(source_node)
+        path = path[index:] + path[:index]
+    path.append(path[0])
+
+    if return_costs:
+        return weight, path, dict(zip(start_labels, costs.tolist()))
+    return weight, path
@@ -0,0 +1,87 @@
+import math
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+def matrix_neighbours(matrix, k, block_size=1024):
+    # k nearest cities per row of a dense matrix, ordered by (distance, index)
+    n = len(matrix)
+    candidates = np.empty((n, k), dtype=np.intp)
+    for start in range(0, n, block_size):
+        rows = np.array(matrix[start:start + block_size], dtype=np.float64)
+        rows[np.arange(len(rows)), np.arange(start, start + len(rows))] = np.inf
+        nearest = np.argpartition(rows, k - 1, axis=1)[:, :k] if k < n - 1 else np.argsort(rows, axis=1)[:, :k]
+        values = np.take_along_axis(rows, nearest, axis=1)
+        order = np.lexsort((nearest, values), axis=1)
+        candidates[start:start + len(rows)] = np.take_along_axis(nearest, order, axis=1)
+    return candidates
+
+
+def point_neighbours(points, k, block_size=1024):
+    # geometric instances never need the dense matrix: KD-tree when scipy is there, blocked scan otherwise
+    n = len(points)
+    if cKDTree is not None:
+        _, nearest = cKDTree(points).query(points, k=k + 1)
+        # drop each point itself (normally column 0, but duplicates can swap places)
+        own = nearest == np.arange(n)[:, None]
+        own[~own.any(axis=1), -1] = True
+        return nearest[~own].reshape(n, k).astype(np.intp)
+
+    candidates = np.empty((n, k), dtype=np.intp)
+    for start in range(0, n, block_size):
+        diff = points[start:start + block_size, None, :] - points[None, :, :]
+        rows = (diff ** 2).sum(axis=-1)
+        rows[np.arange(len(rows)), np.arange(start, start + len(rows))] = np.inf
+        nearest = np.argpartition(rows, k - 1, axis=1)[:, :k] if k < n - 1 else np.argsort(rows, axis=1)[:, :k]
+        values = np.take_along_axis(rows, nearest, axis=1)
+        order = np.lexsort((nearest, values), axis=1)
+        candidates[start:start + len(rows)] = np.take_along_axis(nearest, order, axis=1)
+    return candidates
+
+
+def neighbour_lists(instance, k=10):
+    # (n, k) nearest cities of every city, nearest first, built once and cached on the instance
+    k = min(k, len(instance) - 1)
+    if k <= 0:
+        return np.empty((len(instance), 0), dtype=np.intp)
+    cached = instance._neighbours
+    if cached is not None and cached.shape[1] >= k:
+        return cached[:, :k]
+
+    if instance.is_dense or instance.coords is None:
+        candidates = matrix_neighbours(instance.matrix, k)
+    else:
+        candidates = point_neighbours(instance.coords, k)
+
+    instance._neighbours = candidates
+    return candidates
+
+
+def distances_from(instance, city, targets=None):
+    # one row of the distance matrix (one row per city for an array of them), computed from the points
+    # when the matrix is not built
+    if instance.is_dense:
+        row = instance.matrix[city]
+        return row if targets is None else row[..., targets]
+    points = instance.coords if targets is None else instance.coords[targets]
+    return np.sqrt(((points - instance.coords[city][..., None, :]) ** 2).sum(axis=-1))
+
+
+def distance_function(instance):
+    # dist(a, b) for the scalar lookups of the move loops, from the points when the matrix is not built
+    if instance.is_dense:
+        return instance.matrix.item
+    points = instance.coords.tolist()
+    return lambda a, b: math.dist(points[a], points[b])
+
+
+def candidate_distances(instance, candidates):
+    # distance from every city to each of its candidates, same shape as the candidate array
+    rows = np.arange(len(candidates))[:, None]
+    if instance.is_dense:
+        return instance.matrix[rows, candidates]
+    return np.sqrt(((instance.coords[candidates] - instance.coords[rows]) ** 2).sum(axis=-1))
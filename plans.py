@@ -0,0 +1,100 @@
+import itertools
+import json
+from collections import namedtuple
+from pathlib import Path
+from registry import SOLVERS, get_solver
+
+CONFIG_FILE = Path(__file__).with_name('benchmark_config.json')
+
+# one solver run: instance (mode, num_nodes, graph_num) and the solver keyword arguments on top of its defaults
+Job = namedtuple('Job', ['mode', 'num_nodes', 'graph_num', 'algorithm', 'params'])
+
+
+def load_config(filename=None):
+    with open(filename or CONFIG_FILE) as f:
+        return json.load(f)
+
+
+def algorithm_budget(config, algorithm):
+    # registry capabilities, then the config defaults and the algorithm's own entry:
+    # max_nodes, anytime, time_limit (s), memory_limit_mb
+    solver = get_solver(algorithm)
+    budget = {'max_nodes': solver.max_nodes, 'anytime': solver.anytime}
+    return {**budget, **config.get('defaults', {}), **config.get('algorithms', {}).get(algorithm, {})}
+
+
+def planned_algorithms(num_nodes, algorithms=None, config=None):
+    config = config if config is not None else load_config()
+    planned = []
+    for name in SOLVERS:
+        max_nodes = algorithm_budget(config, name).get('max_nodes')
+        if (max_nodes is None or num_nodes <= max_nodes) and (algorithms is None or name in algorithms):
+            planned.append(name)
+    return planned
+
+
+def load_plan(filename):
+    # JSON, TOML or YAML (needs PyYAML), chosen by extension
+    path = Path(filename)
+    if path.suffix == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            plan = tomllib.load(f)
+    elif path.suffix in ('.yaml', '.yml'):
+        import yaml
+        with open(path) as f:
+            plan = yaml.safe_load(f)
+    else:
+        with open(path) as f:
+            plan = json.load(f)
+    plan.setdefault('name', path.stem)
+    return plan
+
+
+def parameter_grid(grid):
+    # {"a": [1, 2], "b": 3} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]
+    keys = sorted(grid)
+    values = [grid[key] if isinstance(grid[key], list) else [grid[key]] for key in keys]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def job_params(algorithm, variant, config):
+    # anytime solvers get their time budget as time_limit unless the plan sets one
+    params = dict(variant)
+    budget = algorithm_budget(config, algorithm)
+    if budget['anytime'] and budget.get('time_limit') is not None:
+        params.setdefault('time_limit', budget['time_limit'])
+    return params
+
+
+def params_key(algorithm, params):
+    # the full keyword arguments as the checkpoint and the results store record them
+    return json.dumps({**get_solver(algorithm).params, **params}, sort_keys=True)
+
+
+def expand_plan(plan, config=None):
+    # plan keys: generator (mode or list of modes), sizes, graphs, seed, algorithms ("all" or names),
+    # params ({algorithm: {argument: value or list of values}}), timing
+    # jobs come out grouped by instance, so a runner builds each instance once
+    config = config if config is not None else load_config()
+    modes = plan.get('generator', 'integer')
+    modes = modes if isinstance(modes, list) else [modes]
+    algorithms = plan.get('algorithms', 'all')
+    algorithms = None if algorithms == 'all' else algorithms
+    for name in algorithms or []:
+        get_solver(name)
+
+    jobs = []
+    for mode in modes:
+        for num_nodes in plan['sizes']:
+            planned = planned_algorithms(num_nodes, algorithms, config)
+            for graph_num in range(1, plan.get('graphs', 1) + 1):
+                for name in planned:
+                    for variant in parameter_grid(plan.get('params', {}).get(name, {})):
+                        jobs.append(Job(mode, num_nodes, graph_num, name, job_params(name, variant, config)))
+    return jobs
+
+
+def shard(jobs, index, count):
+    # every count-th job starting at index, for splitting one plan over several machines or invocations
+    return jobs[index::count]
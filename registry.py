@@ -0,0 +1,69 @@
+import importlib
+from collections import namedtuple
+from pathlib import Path
+
+# func is "module:function", the solver module is only imported once the solver is actually used
+# params: default keyword arguments, exact: always returns an optimal tour, anytime: honours a time_limit
+# argument and returns its best tour when it runs out, max_nodes: largest instance it is planned for,
+# lower_bound: returns (weight, path, lower_bound), local_search: result is polished by local_search
+Solver = namedtuple('Solver', ['name', 'display_name', 'func', 'params', 'exact', 'anytime', 'max_nodes',
+                               'lower_bound', 'local_search'])
+
+SOLVERS = {}
+_resolved = {}
+
+# tuned parameters per solver, written by tuning.py
+TUNED_DIR = Path(__file__).with_name('tuned')
+
+
+def register(name, display_name, func, params=None, exact=False, anytime=False, max_nodes=None, lower_bound=False,
+             local_search=False):
+    SOLVERS[name] = Solver(name, display_name, func, params or {}, exact, anytime, max_nodes, lower_bound,
+                           local_search)
+    _resolved.pop(name, None)
+    return SOLVERS[name]
+
+
+def get_solver(name):
+    if name not in SOLVERS:
+        raise ValueError(f"Unknown solver: {name}")
+    return SOLVERS[name]
+
+
+def resolve(name):
+    # the callable behind a registered solver, imported on first use
+    if name not in _resolved:
+        solver = get_solver(name)
+        func = solver.func
+        if isinstance(func, str):
+            module, attribute = func.split(':')
+            module = importlib.import_module(module)
+            func = getattr(module, attribute)
+            # lazily imported dependencies of the module, loaded now rather than inside the first timed call
+            if hasattr(module, 'preload'):
+                module.preload()
+        if solver.local_search:
+            from local_search import with_local_search
+            func = with_local_search(func)
+        _resolved[name] = func
+    return _resolved[name]
+
+
+register('brute_force', 'Brute Force', 'brute_force:brute_force', exact=True, max_nodes=9)
+register('held_karp', 'Held-Karp', 'held_karp:held_karp', exact=True, max_nodes=22)
+register('branch_and_bound', 'Branch and Bound', 'branch_and_bound:branch_and_bound', {'return_bound': True},
+         anytime=True, lower_bound=True)
+register('christofides', 'Christofides', 'christofides:christofides')
+register('christofides_ls', 'Christofides + Local Search', 'christofides:christofides', local_search=True)
+register('nearest_neighbour', 'Nearest Neighbour', 'nearest_neighbour:nearest_neighbour')
+register('nearest_neighbour_all', 'Nearest Neighbour (all starts)', 'nearest_neighbour:nearest_neighbour_multistart')
+register('nearest_neighbour_ls', 'Nearest Neighbour + Local Search', 'nearest_neighbour:nearest_neighbour',
+         local_search=True)
+register('lin_kernighan', 'Lin-Kernighan', 'lin_kernighan:lin_kernighan', anytime=True)
+register('genetic', 'Genetic Algorithm', 'genetic:genetic', anytime=True)
+register('ant_colony', 'Ant Colony', 'ant_colony:ant_colony', anytime=True)
+# the tuned variants only exist once tuning.py has written parameters for them
+if (TUNED_DIR / 'genetic.json').exists():
+    register('genetic_tuned', 'Genetic Algorithm (tuned)', 'tuning:genetic_tuned', anytime=True)
+if (TUNED_DIR / 'ant_colony.json').exists():
+    register('ant_colony_tuned', 'Ant Colony (tuned)', 'tuning:ant_colony_tuned', anytime=True)
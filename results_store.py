@@ -0,0 +1,144 @@
+import json
+import os
+import platform
+import socket
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# one row per (run, instance, algorithm, parameters), partitioned by generator mode and size on disk:
+# results/mode=euclidean/num_nodes=100/<run_id>-<part>.parquet
+SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('instance_id', pa.string()),
+    ('graph_num', pa.int32()),
+    ('algorithm', pa.dictionary(pa.int8(), pa.string())),
+    ('params', pa.string()),
+    ('seed', pa.int64()),
+    ('time', pa.float64()),  # median wall time of the timed repeats
+    ('weight', pa.float64()),
+    ('lower_bound', pa.float64()),
+    ('tour', pa.list_(pa.int32())),
+    ('time_iqr', pa.float64()),
+    ('cpu_time', pa.float64()),
+    ('peak_memory', pa.int64()),
+    ('repeats', pa.int32()),
+    ('outliers', pa.int32()),
+    ('samples', pa.list_(pa.float64())),
+    ('status', pa.dictionary(pa.int8(), pa.string())),
+    # from a traced call (benchmark.py --trace): iterations run, seconds to the final best cost, hot-path counters
+    # and the improvements as JSON [[iteration, seconds, best cost], ...]
+    ('iterations', pa.int32()),
+    ('time_to_best', pa.float64()),
+    ('counters', pa.string()),
+    ('convergence', pa.string()),
+    ('python', pa.string()),
+    ('numpy', pa.string()),
+    ('platform', pa.string()),
+    ('host', pa.string()),
+    ('cpu_count', pa.int32()),
+    ('mode', pa.string()),
+    ('num_nodes', pa.int32()),
+])
+
+PARTITIONING = ds.partitioning(pa.schema([('mode', pa.string()), ('num_nodes', pa.int32())]), flavor='hive')
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'host': socket.gethostname(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def encode_params(params):
+    # canonical JSON so equal parameter sets compare equal as strings
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def append_results(root, run_id, rows):
+    # rows: dicts with the SCHEMA fields (environment columns are filled in here)
+    # a run writes its own files, so appending never touches earlier data; writing the
+    # same run again replaces its files instead of duplicating rows
+    if not rows:
+        return
+    env = environment()
+    columns = {field.name: [] for field in SCHEMA}
+    for row in rows:
+        row = {**env, **row, 'run_id': run_id}
+        for name in columns:
+            value = row.get(name)
+            if name == 'tour' and value is not None:
+                value = np.asarray(value, dtype=np.int32)
+            elif name == 'params' and not isinstance(value, str):
+                value = encode_params(value or {})
+            columns[name].append(value)
+
+    table = pa.table(columns, schema=SCHEMA)
+    ds.write_dataset(table, root, format='parquet', partitioning=PARTITIONING,
+                     basename_template=f"{run_id}-{{i}}.parquet", existing_data_behavior='overwrite_or_ignore')
+
+
+def read_results(root, columns=None, **equals):
+    # only the requested columns are decoded, equality filters on mode/num_nodes skip whole directories
+    if not Path(root).exists():
+        return None
+    # the full schema, so files written before a column existed read it as nulls
+    dataset = ds.dataset(root, schema=SCHEMA, format='parquet', partitioning=PARTITIONING)
+    condition = None
+    for name, value in equals.items():
+        term = ds.field(name).isin(value) if isinstance(value, (list, tuple, set)) else ds.field(name) == value
+        condition = term if condition is None else condition & term
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def read_tours(root, **equals):
+    # tours come back as int32 arrays, one per row
+    table = read_results(root, columns=['instance_id', 'algorithm', 'run_id', 'tour'], **equals)
+    if table is not None:
+        table['tour'] = table['tour'].map(lambda tour: None if tour is None else np.asarray(tour, dtype=np.int32))
+    return table
+
+
+def variant_labels(results):
+    # algorithms run with several parameter sets (plan grids) get the differing values in their name,
+    # e.g. genetic[mutation_rate=0.1,sol_per_pop=100]
+    labels = results['algorithm'].astype(str)
+    if 'params' not in results.columns:
+        return labels
+    for algorithm in labels.unique():
+        rows = labels == algorithm
+        variants = results.loc[rows, 'params'].map(json.loads)
+        keys = sorted({key for params in variants for key in params})
+        varying = [key for key in keys if len({json.dumps(params.get(key)) for params in variants}) > 1]
+        if varying:
+            labels[rows] = [f"{algorithm}[{','.join(f'{key}={params.get(key)}' for key in varying)}]"
+                            for params in variants]
+    return labels
+
+
+def wide_results(results):
+    # long store rows -> one row per graph with {algorithm}_time/_weight/_lower_bound columns,
+    # the layout of the old benchmark_results CSVs; the latest run wins for repeated jobs
+    results = results.assign(algorithm=variant_labels(results)).sort_values('run_id', kind='stable')
+    results = results.drop_duplicates(['instance_id', 'algorithm'], keep='last')
+    algorithms = list(dict.fromkeys(results['algorithm']))
+
+    wide = results.pivot(index=['num_nodes', 'graph_num', 'instance_id'], columns='algorithm',
+                         values=['time', 'weight', 'lower_bound'])
+    wide.columns = [f'{algorithm}_{value}' for value, algorithm in wide.columns]
+    wide = wide.dropna(axis=1, how='all').reset_index()
+
+    ordered = ['graph_num', 'num_nodes'] + [f'{algorithm}_{value}' for algorithm in algorithms
+                                            for value in ('time', 'weight', 'lower_bound')
+                                            if f'{algorithm}_{value}' in wide.columns]
+    return wide[ordered]
+
+
+def new_run_id():
+    return datetime.now().strftime('%Y%m%d-%H%M%S') + f"-{os.getpid()}"
@@ -0,0 +1,497 @@
+import argparse
+import bisect
+import http.client
+import json
+import multiprocessing
+import queue
+import random
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from registry import SOLVERS, get_solver, resolve
+
+# POST /solve  {"algorithm": ..., "points": [[x, y], ...] | "matrix": [[...]] | "instance": path,
+#               "source_node": 0, "params": {...}, "time_limit": seconds}  (or a list of them)
+# GET /metrics latency histograms per algorithm, GET /health
+
+# latency histogram bucket bounds in milliseconds, the last bucket is everything above
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]
+
+# requests on at most this many cities are micro-batched, larger ones go to a worker alone
+SMALL_REQUEST = 200
+
+
+def warm_worker(algorithms):
+    # imports every solver module and runs each once on a tiny instance, so no request pays for it
+    from distance_matrix import DistanceMatrix
+    instance = DistanceMatrix.from_points(np.random.default_rng(0).random((6, 2)))
+    for name in algorithms:
+        solver = get_solver(name)
+        kwargs = {**solver.params, **({'time_limit': 0.1} if solver.anytime else {})}
+        try:
+            resolve(name)(instance, 0, **kwargs)
+        except Exception:
+            pass
+
+
+@lru_cache(maxsize=32)
+def named_instance(path):
+    # instances referenced by file stay loaded in the worker, with their cached neighbour lists
+    from tsplib import read_tsplib
+    from instance_store import load_instance
+    return read_tsplib(path) if path.endswith('.tsp') else load_instance(path)
+
+
+def request_instance(request):
+    from distance_matrix import DistanceMatrix
+    if 'points' in request:
+        return DistanceMatrix.from_points(np.asarray(request['points'], dtype=np.float64))
+    if 'matrix' in request:
+        return DistanceMatrix.from_array(np.asarray(request['matrix']))
+    if 'instance' in request:
+        return named_instance(request['instance'])
+    raise ValueError("request needs points, matrix or instance")
+
+
+def request_size(request):
+    for key in ('points', 'matrix'):
+        if key in request:
+            return len(request[key])
+    return None
+
+
+def solve_request(request):
+    # runs in a worker process; anytime solvers get the request's time budget as their time_limit
+    start = time.perf_counter()
+    try:
+        name = request['algorithm']
+        solver = get_solver(name)
+        instance = request_instance(request)
+        if solver.max_nodes is not None and len(instance) > solver.max_nodes:
+            raise ValueError(f"{name} is limited to {solver.max_nodes} cities")
+        kwargs = {**solver.params, **request.get('params', {})}
+        if solver.anytime and request.get('time_limit') is not None:
+            kwargs.setdefault('time_limit', request['time_limit'])
+        weight, path, *extra = resolve(name)(instance, request.get('source_node', instance.nodes[0]), **kwargs)
+        result = {'status': 'completed', 'weight': weight, 'path': list(path)}
+        if extra:
+            result['lower_bound'] = extra[0]
+    except Exception as e:
+        result = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+    result['solve_time'] = time.perf_counter() - start
+    return result
+
+
+def worker_main(connection, algorithms):
+    # one warm worker process: solves each micro-batch back to back, sending every result as it is done
+    warm_worker(algorithms)
+    connection.send('ready')
+    while True:
+        requests = connection.recv()
+        if requests is None:
+            return
+        for request in requests:
+            connection.send(solve_request(request))
+
+
+def request_error(request):
+    # why a request can not be dispatched, None if it can
+    if not isinstance(request, dict):
+        return "a request must be a JSON object"
+    algorithm = request.get('algorithm')
+    if not isinstance(algorithm, str) or algorithm not in SOLVERS:
+        return f"unknown algorithm: {algorithm}"
+    size = None
+    for key in ('points', 'matrix'):
+        if key not in request:
+            continue
+        if not isinstance(request[key], list) or not request[key]:
+            return f"{key} must be a non-empty list"
+        try:
+            array = np.asarray(request[key], dtype=np.float64)
+        except (TypeError, ValueError):
+            return f"{key} must be a list of equally long lists of numbers"
+        if array.ndim != 2 or key == 'matrix' and array.shape[0] != array.shape[1]:
+            return "matrix must be square" if key == 'matrix' else "points must be a list of coordinate lists"
+        size = len(array)
+    if size is None and not isinstance(request.get('instance'), str):
+        return "request needs points, matrix or an instance path"
+    source_node = request.get('source_node')
+    if source_node is not None and size is not None and (
+            isinstance(source_node, bool) or not isinstance(source_node, int) or not 0 <= source_node < size):
+        return f"source_node must be a city index below {size}"
+    if not isinstance(request.get('params', {}), dict):
+        return "params must be a JSON object"
+    time_limit = request.get('time_limit')
+    if time_limit is not None and (isinstance(time_limit, bool) or not isinstance(time_limit, (int, float))):
+        return "time_limit must be a number of seconds"
+    return None
+
+
+def encode(value):
+    return json.dumps(value, default=lambda o: o.item() if hasattr(o, 'item') else str(o)).encode()
+
+
+class LatencyHistogram:
+    # bucket counts since start plus the most recent samples for percentiles
+    def __init__(self, recent=10000):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=recent)
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+            self.recent.append(seconds)
+            self.total += 1
+
+    def summary(self):
+        with self.lock:
+            recent = np.array(self.recent)
+            counts = list(self.counts)
+        summary = {'count': self.total,
+                   'buckets_ms': dict(zip([f"le_{bound}" for bound in BUCKETS_MS] + ['inf'], counts))}
+        if len(recent):
+            for q in (50, 90, 99):
+                summary[f'p{q}_ms'] = float(np.percentile(recent, q) * 1000)
+            summary['mean_ms'] = float(recent.mean() * 1000)
+        return summary
+
+
+class Pending:
+    # deadline: perf_counter time after which the request is cancelled, None for no limit
+    def __init__(self, request, deadline=None):
+        self.request = request
+        self.deadline = deadline
+        self.result = None
+        self.done = threading.Event()
+        self.queued = time.perf_counter()
+
+    def finish(self, result):
+        self.result = result
+        self.done.set()
+
+
+class Worker:
+    # a warm solver process of its own, so a request that overruns its deadline can be killed
+    def __init__(self, context, algorithms):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child, algorithms), daemon=True)
+        self.process.start()
+        child.close()
+
+    def wait_ready(self):
+        self.connection.recv()
+        return self
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class Dispatcher:
+    # collects small requests for up to batch_wait seconds (or batch_size of them) and hands each
+    # batch to one warm worker; big requests are queued on their own right away. A request still
+    # running at its deadline gets its worker killed and replaced by a freshly warmed one
+
+    def __init__(self, workers=2, batch_size=16, batch_wait=0.002, algorithms=None):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.algorithms = list(algorithms or SOLVERS)
+        self.context = multiprocessing.get_context('spawn')
+        self.queue = queue.Queue()
+        self.batches = queue.Queue()
+        self.latency = {}
+        self.queue_time = LatencyHistogram()
+        self.lock = threading.Lock()
+        self.restarts = 0
+        # start (and warm) every worker now instead of on the first requests
+        self.workers = [Worker(self.context, self.algorithms) for _ in range(workers)]
+        for worker in self.workers:
+            worker.wait_ready()
+        for slot in range(workers):
+            threading.Thread(target=self.serve, args=(slot,), daemon=True).start()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, request, deadline=None):
+        pending = Pending(request, deadline)
+        size = request_size(request)
+        if size is not None and size > SMALL_REQUEST:
+            self.batches.put([pending])
+        else:
+            self.queue.put(pending)
+        return pending
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.perf_counter(), 0)))
+                except queue.Empty:
+                    break
+            self.batches.put(batch)
+
+    def serve(self, slot):
+        # feeds one worker batch after batch, waiting on each result only until that request's deadline
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            for pending in batch:
+                self.queue_time.add(started - pending.queued)
+            batch = [pending for pending in batch if not self.expired(pending, started)]
+            if not batch:
+                continue
+            worker = self.workers[slot]
+            worker.connection.send([pending.request for pending in batch])
+            for position, pending in enumerate(batch):
+                timeout = None if pending.deadline is None else max(pending.deadline - time.perf_counter(), 0)
+                try:
+                    if worker.connection.poll(timeout):
+                        pending.finish(worker.connection.recv())
+                        continue
+                    result = {'status': 'timeout'}
+                except EOFError:
+                    result = {'status': 'error', 'error': "worker process died"}
+                # overran its deadline (or took the worker down): the rest of the batch goes back in line
+                self.replace_worker(slot)
+                pending.finish(result)
+                for rest in batch[position + 1:]:
+                    self.batches.put([rest])
+                break
+
+    def expired(self, pending, now):
+        if pending.deadline is not None and now >= pending.deadline:
+            pending.finish({'status': 'timeout'})
+            return True
+        return False
+
+    def replace_worker(self, slot):
+        self.workers[slot].kill()
+        with self.lock:
+            self.restarts += 1
+        self.workers[slot] = Worker(self.context, self.algorithms).wait_ready()
+
+    def record(self, algorithm, seconds):
+        with self.lock:
+            histogram = self.latency.setdefault(algorithm, LatencyHistogram())
+        histogram.add(seconds)
+
+    def metrics(self):
+        with self.lock:
+            latency = dict(self.latency)
+        return {'latency': {name: histogram.summary() for name, histogram in latency.items()},
+                'queue': self.queue_time.summary(), 'waiting': self.queue.qsize() + self.batches.qsize(),
+                'worker_restarts': self.restarts}
+
+    def shutdown(self):
+        for _ in self.workers:
+            self.batches.put(None)
+        for worker in self.workers:
+            worker.kill()
+
+
+class SolveHandler(BaseHTTPRequestHandler):
+    # the server carries the dispatcher and the default time budget
+    protocol_version = 'HTTP/1.1'
+
+    def reply(self, code, body):
+        data = encode(body)
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.reply(200, {'status': 'ok', 'algorithms': list(SOLVERS)})
+        elif self.path == '/metrics':
+            self.reply(200, self.server.dispatcher.metrics())
+        else:
+            self.reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/solve':
+            self.reply(404, {'error': 'not found'})
+            return
+        start = time.perf_counter()
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        except ValueError as e:
+            self.reply(400, {'error': f"bad JSON: {e}"})
+            return
+        requests = body if isinstance(body, list) else [body]
+        if not requests:
+            self.reply(400, {'error': "empty batch"})
+            return
+        for request in requests:
+            error = request_error(request)
+            if error is not None:
+                self.reply(400, {'error': error})
+                return
+            request.setdefault('time_limit', self.server.time_limit)
+
+        pending = []
+        for request in requests:
+            # anytime solvers stop at their time_limit, the others are killed with their worker after a grace period
+            budget = request['time_limit']
+            deadline = start + budget + max(1.0, 0.1 * budget) if budget else None
+            pending.append(self.server.dispatcher.submit(request, deadline))
+        results = []
+        for item in pending:
+            item.done.wait()
+            result = {**item.result, 'latency': time.perf_counter() - start}
+            self.server.dispatcher.record(item.request['algorithm'], result['latency'])
+            results.append(result)
+
+        failed = all(result['status'] == 'timeout' for result in results)
+        self.reply(504 if failed else 200, results if isinstance(body, list) else results[0])
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def address_string(self):
+        # unix sockets have no client address
+        return self.client_address[0] if self.client_address else 'unix'
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(dispatcher, host='127.0.0.1', port=8765, unix_socket=None, time_limit=30.0, verbose=False):
+    if unix_socket is not None:
+        import os
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = UnixHTTPServer(unix_socket, SolveHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), SolveHandler)
+        server.daemon_threads = True
+    server.dispatcher = dispatcher
+    server.time_limit = time_limit
+    server.verbose = verbose
+    return server
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class ServiceClient:
+    # one keep-alive connection, not thread safe: use one client per thread
+    def __init__(self, host='127.0.0.1', port=8765, unix_socket=None, timeout=None):
+        if unix_socket is not None:
+            self.connection = UnixHTTPConnection(unix_socket, timeout)
+        else:
+            self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def call(self, method, path, body=None):
+        data = encode(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if data is not None else {}
+        self.connection.request(method, path, body=data, headers=headers)
+        response = self.connection.getresponse()
+        return json.loads(response.read())
+
+    def solve(self, algorithm, points=None, matrix=None, instance=None, **options):
+        request = {'algorithm': algorithm, **options}
+        for key, value in (('points', points), ('matrix', matrix), ('instance', instance)):
+            if value is not None:
+                request[key] = value.tolist() if isinstance(value, np.ndarray) else value
+        return self.call('POST', '/solve', request)
+
+    def metrics(self):
+        return self.call('GET', '/metrics')
+
+    def close(self):
+        self.connection.close()
+
+
+def load_test(connect, requests=1000, concurrency=16, sizes=(10, 50), algorithms=('nearest_neighbour',), seed=0):
+    # concurrency client threads firing random point sets; returns client-side latency and throughput
+    rng = random.Random(seed)
+    jobs = [(rng.choice(algorithms), [[rng.random() * 1000, rng.random() * 1000] for _ in range(rng.choice(sizes))])
+            for _ in range(requests)]
+    local = threading.local()
+
+    def call(job):
+        if not hasattr(local, 'client'):
+            local.client = connect()
+        start = time.perf_counter()
+        result = local.client.solve(job[0], points=job[1])
+        return time.perf_counter() - start, result['status']
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in results])
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {'requests': requests, 'concurrency': concurrency, 'seconds': elapsed,
+            'requests_per_second': requests / elapsed, 'statuses': statuses,
+            **{f'p{q}_ms': float(np.percentile(latencies, q) * 1000) for q in (50, 90, 99)},
+            'max_ms': float(latencies.max() * 1000)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local TSP solve service")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="run the service")
+    test = commands.add_parser('load-test', help="fire random requests at a running service")
+    for command in (serve, test):
+        command.add_argument("--host", default='127.0.0.1')
+        command.add_argument("--port", type=int, default=8765)
+        command.add_argument("--unix", help="unix socket path instead of TCP")
+    serve.add_argument("--workers", type=int, default=2, help="warm solver processes")
+    serve.add_argument("--batch-size", type=int, default=16, help="small requests per micro-batch")
+    serve.add_argument("--batch-wait", type=float, default=0.002, help="seconds to wait for a micro-batch to fill")
+    serve.add_argument("--time-limit", type=float, default=30.0, help="default per-request time budget in seconds")
+    serve.add_argument("--algorithms", nargs='+', choices=list(SOLVERS), help="solvers to warm up (default: all)")
+    serve.add_argument("--verbose", action='store_true', help="log every request")
+    test.add_argument("--requests", type=int, default=1000)
+    test.add_argument("--concurrency", type=int, default=16)
+    test.add_argument("--sizes", type=int, nargs='+', default=[10, 50])
+    test.add_argument("--algorithms", nargs='+', choices=list(SOLVERS), default=['nearest_neighbour'])
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        dispatcher = Dispatcher(args.workers, args.batch_size, args.batch_wait, args.algorithms)
+        server = make_server(dispatcher, args.host, args.port, args.unix, args.time_limit, args.verbose)
+        print(f"Serving on {args.unix or f'http://{args.host}:{args.port}'} with {args.workers} warm workers")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            dispatcher.shutdown()
+    else:
+        report = load_test(lambda: ServiceClient(args.host, args.port, args.unix), args.requests, args.concurrency,
+                           args.sizes, args.algorithms)
+        print(json.dumps(report, indent=2))
+        client = ServiceClient(args.host, args.port, args.unix)
+        print(json.dumps(client.metrics(), indent=2))
+        client.close()
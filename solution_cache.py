@@ -0,0 +1,80 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+import numpy as np
+
+CACHE_FILE = Path('cache') / 'solutions.sqlite'
+
+# total size of the stored results, least recently used entries go first beyond it
+MAX_BYTES = 256 * 2 ** 20
+
+
+def fingerprint(instance):
+    # content hash of the distances: the points of a geometric instance, the matrix otherwise;
+    # node labels are left out (tours are cached as indices), computed once per instance
+    if instance._fingerprint is None:
+        data = instance.coords if instance.coords is not None else instance.matrix
+        data = np.ascontiguousarray(data)
+        digest = hashlib.sha256()
+        digest.update(f"{'points' if instance.coords is not None else 'matrix'}:{data.dtype.str}:{data.shape}".encode())
+        # hashed in row blocks so a memory-mapped matrix is never copied whole
+        rows = max(1, 2 ** 24 // max(data[0].nbytes, 1)) if len(data) else 1
+        for start in range(0, len(data), rows):
+            digest.update(np.ascontiguousarray(data[start:start + rows]).data)
+        instance._fingerprint = digest.hexdigest()
+    return instance._fingerprint
+
+
+def solution_key(instance, algorithm, params, seed):
+    # params: the canonical JSON of the solver keyword arguments (plans.params_key)
+    return hashlib.sha256(f"{fingerprint(instance)}:{algorithm}:{params}:{seed}".encode()).hexdigest()
+
+
+class SolutionCache:
+    # content-addressed solver results in one SQLite file, safe to share between processes and runs
+
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=60)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                                    "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+
+    def get(self, key):
+        found = self.connection.execute("SELECT value FROM solutions WHERE key = ?", (key,)).fetchone()
+        if found is None:
+            return None
+        with self.connection:
+            self.connection.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(found[0])
+
+    def put(self, key, value):
+        encoded = json.dumps(value)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                                    (key, encoded, len(encoded), time.time()))
+            self.evict()
+
+    def evict(self):
+        # drop everything past max_bytes, counting from the most recently used entry
+        self.connection.execute(
+            "DELETE FROM solutions WHERE key IN (SELECT key FROM (SELECT key, SUM(size) OVER "
+            "(ORDER BY last_used DESC, key) AS total FROM solutions) WHERE total > ?)", (self.max_bytes,))
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM solutions")
+
+    def size(self):
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
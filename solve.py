@@ -0,0 +1,156 @@
+import argparse
+import contextlib
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import numpy as np
+from distance_matrix import DistanceMatrix
+from instance_store import instance_name, has_instance, load_instance
+from tsplib import read_tsplib
+from registry import SOLVERS, get_solver
+from plans import load_config, load_plan, job_params
+from benchmark import generate_instance, job_seed, run_job, run_budgeted_job
+from generator import INSTANCE_MODES
+
+# a source is (kind, instance_id, location): workers load the instance themselves, so only
+# file names and generator arguments cross process boundaries
+
+
+def path_sources(paths):
+    # TSPLIB files, stored instances (.json + .npy) and bare .npy matrices, directories are scanned one level deep
+    for path in map(Path, paths):
+        files = sorted(path.iterdir()) if path.is_dir() else [path]
+        for file in files:
+            if file.suffix == '.tsp':
+                yield 'tsplib', file.stem, str(file)
+            elif file.suffix == '.json' and has_instance(file):
+                yield 'store', file.stem, str(file.with_suffix(''))
+            elif file.suffix == '.npy' and not file.with_suffix('.json').exists():
+                yield 'matrix', file.stem, str(file)
+            elif not path.is_dir():
+                raise ValueError(f"Not an instance file: {file}")
+
+
+def generated_sources(mode, sizes, count=1, base_seed=0):
+    for num_nodes in sizes:
+        for graph_num in range(1, count + 1):
+            seed = job_seed(base_seed, num_nodes, graph_num)
+            yield 'generated', instance_name(mode, num_nodes, graph_num, seed), (mode, num_nodes, graph_num, base_seed)
+
+
+def load_source(source):
+    kind, _, location = source
+    if kind == 'tsplib':
+        return read_tsplib(location)
+    if kind == 'store':
+        return load_instance(location)
+    if kind == 'matrix':
+        return DistanceMatrix.from_array(np.load(location, mmap_mode='r'))
+    if kind == 'generated':
+        mode, num_nodes, graph_num, base_seed = location
+        return generate_instance(num_nodes, graph_num, base_seed, mode)
+    raise ValueError(f"Unknown instance source: {kind}")
+
+
+def solve_instance(source, algorithms, params=None, base_seed=0, config=None):
+    # every algorithm on one instance, loaded once; the DistanceMatrix (and the networkx graph a solver
+    # may build from it) is shared by all of them
+    # config: run each solver with its time/memory budget from benchmark_config.json
+    _, instance_id, _ = source
+    records = []
+    # solver warnings go to stderr, stdout may be the JSON-lines stream
+    with contextlib.redirect_stdout(sys.stderr):
+        instance = load_source(source)
+        n = len(instance)
+        for algorithm in algorithms:
+            solver = get_solver(algorithm)
+            record = {'instance': instance_id, 'num_nodes': n, 'algorithm': algorithm}
+            if solver.max_nodes is not None and n > solver.max_nodes:
+                records.append({**record, 'status': 'skipped'})
+                continue
+
+            seed = job_seed(base_seed, n, instance_id, algorithm)
+            variant = (params or {}).get(algorithm, {})
+            if config is not None:
+                row = run_budgeted_job(instance, 0, n, algorithm, seed, config=config,
+                                       params=job_params(algorithm, variant, config))
+            else:
+                row = run_job(instance, 0, n, algorithm, seed, params=variant)
+
+            records.append({**record, 'status': row['status'], 'weight': row['weight'], 'time': row['time'],
+                            'lower_bound': row['lower_bound'], 'seed': seed,
+                            'params': json.loads(row['params']) if row['params'] else None,
+                            'tour': instance.labels(row['tour']) if row['tour'] is not None else None})
+    return records
+
+
+def solve_batch(sources, algorithms, workers=1, params=None, base_seed=0, config=None):
+    # yields one record per (instance, algorithm) as soon as its instance is done; with workers > 1
+    # instances run in parallel and at most two per worker are queued, so sources can be a long generator
+    # params: {algorithm: {argument: value}} on top of the registry defaults
+    for name in algorithms:
+        get_solver(name)
+    if workers <= 1:
+        for source in sources:
+            yield from solve_instance(source, algorithms, params, base_seed, config)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for source in sources:
+            pending.add(executor.submit(solve_instance, source, algorithms, params, base_seed, config))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve many instances with the registered solvers, "
+                                                 "one JSON line per (instance, algorithm)")
+    parser.add_argument("paths", nargs='*', help="TSPLIB files, stored instances, .npy matrices or directories of them")
+    parser.add_argument("--generate", choices=['integer', *INSTANCE_MODES], help="also solve generated instances")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[], help="sizes of the generated instances")
+    parser.add_argument("--count", type=int, default=1, help="generated instances per size")
+    parser.add_argument("--algorithms", nargs='+', choices=list(SOLVERS), default=['nearest_neighbour'])
+    parser.add_argument("--params", help="solver arguments as JSON or a JSON/TOML/YAML file: {algorithm: {...}}")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, one instance at a time each")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for generated instances and solvers")
+    parser.add_argument("--budgets", action='store_true', help="enforce the time/memory budgets of --config")
+    parser.add_argument("--config", default=None, help="time/memory budgets per algorithm")
+    parser.add_argument("--output", help="JSON-lines file (default: stdout)")
+    args = parser.parse_args()
+
+    params = None
+    if args.params:
+        params = load_plan(args.params) if Path(args.params).exists() else json.loads(args.params)
+        params.pop('name', None)
+
+    sources = path_sources(args.paths)
+    if args.generate:
+        sources = itertools.chain(sources, generated_sources(args.generate, args.sizes, args.count, args.seed))
+
+    config = load_config(args.config) if args.budgets else None
+    output = open(args.output, 'w') if args.output else sys.stdout
+    instances, runs = set(), 0
+    start = time.perf_counter()
+    try:
+        for record in solve_batch(sources, args.algorithms, args.workers, params, args.seed, config):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            instances.add(record['instance'])
+            runs += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Solved {len(instances)} instances ({runs} runs) in {elapsed:.2f}s: "
+          f"{len(instances) / elapsed if elapsed > 0 else 0:.2f} instances/s", file=sys.stderr)
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# cold start of every entry point: `python -X importtime <script> --help` exits right after the imports
+ENTRY_POINTS = ['main.py', 'benchmark.py', 'solve.py', 'service.py', 'tuning.py', 'analyze_benchmarks.py']
+
+# dependencies an entry point should only load when it really needs them
+HEAVY_MODULES = ['networkx', 'scipy', 'pandas', 'matplotlib', 'pyarrow', 'pygad', 'acopy']
+
+HISTORY_FILE = Path('benchmarks') / 'startup.jsonl'
+
+
+def parse_importtime(stderr):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package", nesting shown by indent
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({'module': name.strip(), 'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+                        'self': int(self_us) / 1e6, 'cumulative': int(cumulative_us) / 1e6})
+    return modules
+
+
+def measure_startup(script, args=('--help',), python=sys.executable):
+    # one fresh interpreter: wall time of the whole process and the import tree it loaded
+    start = time.perf_counter()
+    completed = subprocess.run([python, '-X', 'importtime', script, *args], capture_output=True, text=True,
+                               cwd=Path(script).parent, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'})
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{script} failed: {completed.stderr.strip().splitlines()[-1:]}")
+    modules = parse_importtime(completed.stderr)
+    top = [module for module in modules if module['depth'] == 0]
+    return {'wall': wall, 'imports': sum(module['cumulative'] for module in top),
+            'modules': len(modules), 'top': top,
+            'heavy': sorted({module['module'].split('.')[0] for module in modules} & set(HEAVY_MODULES))}
+
+
+def startup_profile(script, repeat=5, **options):
+    # medians over `repeat` runs after one discarded run that warms the file system cache
+    measure_startup(script, **options)
+    runs = [measure_startup(script, **options) for _ in range(repeat)]
+    slowest = {}
+    for run in runs:
+        for module in run['top']:
+            slowest.setdefault(module['module'], []).append(module['cumulative'])
+    slowest = sorted(((statistics.median(times), name) for name, times in slowest.items()), reverse=True)
+    return {'entry_point': Path(script).name,
+            'wall': statistics.median(run['wall'] for run in runs),
+            'imports': statistics.median(run['imports'] for run in runs),
+            'modules': runs[-1]['modules'], 'heavy': runs[-1]['heavy'],
+            'slowest': [{'module': name, 'cumulative': seconds} for seconds, name in slowest[:5]]}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start import time of the entry points")
+    parser.add_argument("scripts", nargs='*', default=ENTRY_POINTS, help="entry points (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="measured runs per entry point")
+    parser.add_argument("--output", default=HISTORY_FILE, help="JSON-lines history the results are appended to")
+    parser.add_argument("--no-save", action='store_true', help="only print the results")
+    args = parser.parse_args()
+
+    here = Path(__file__).resolve().parent
+    revision = git_revision()
+    profiles = []
+    print(f"{'Entry point':<24}{'Wall (ms)':>11}{'Imports (ms)':>14}{'Modules':>9}  Heavy dependencies")
+    for script in args.scripts:
+        profile = startup_profile(str(here / script), args.repeat)
+        profiles.append(profile)
+        print(f"{profile['entry_point']:<24}{profile['wall'] * 1000:>11.1f}{profile['imports'] * 1000:>14.1f}"
+              f"{profile['modules']:>9}  {', '.join(profile['heavy']) or '-'}")
+        for module in profile['slowest'][:3]:
+            print(f"{'':<4}{module['module']:<30}{module['cumulative'] * 1000:>8.1f} ms")
+
+    if not args.no_save:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'a') as file:
+            file.write(json.dumps({'date': datetime.now().isoformat(timespec='seconds'), 'revision': revision,
+                                   'python': sys.version.split()[0], 'repeat': args.repeat,
+                                   'profiles': profiles}) + "\n")
+        print(f"\n✓ Appended to {output}")
@@ -0,0 +1,68 @@
+import time
+import tracemalloc
+import numpy as np
+import instrumentation
+
+
+def summarize(samples):
+    # median/IQR and Tukey outliers (outside 1.5 IQR of the quartiles) of a list of seconds
+    samples = np.asarray(samples, dtype=np.float64)
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    iqr = q3 - q1
+    outliers = samples[(samples < q1 - 1.5 * iqr) | (samples > q3 + 1.5 * iqr)]
+    return {
+        'median': float(median),
+        'iqr': float(iqr),
+        'min': float(samples.min()),
+        'max': float(samples.max()),
+        'outliers': outliers.tolist(),
+    }
+
+
+def measure(func, *args, warmup=1, repeat=5, min_time=0.0, max_repeat=1000, memory=False, trace=False, setup=None,
+            **kwargs):
+    # calls func(*args, **kwargs) `warmup` times untimed, then at least `repeat` timed times and
+    # more (up to max_repeat) until min_time seconds were measured, so sub-millisecond solvers
+    # get enough samples; setup() runs before every call outside the timed region (e.g. to reseed RNGs)
+    # tracemalloc slows allocation-heavy code down, so peak memory comes from one extra
+    # untimed call instead of being folded into the timings; the same goes for the convergence trace
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func(*args, **kwargs)
+
+    wall, cpu = [], []
+    result = None
+    while len(wall) < max(repeat, 1) or (sum(wall) < min_time and len(wall) < max_repeat):
+        if setup is not None:
+            setup()
+        cpu_start = time.process_time_ns()
+        wall_start = time.perf_counter_ns()
+        result = func(*args, **kwargs)
+        wall.append((time.perf_counter_ns() - wall_start) / 1e9)
+        cpu.append((time.process_time_ns() - cpu_start) / 1e9)
+
+    stats = summarize(wall)
+    stats.update(samples=wall, cpu_time=float(np.median(cpu)), repeat=len(wall), warmup=warmup, peak_memory=None)
+
+    if memory:
+        if setup is not None:
+            setup()
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        func(*args, **kwargs)
+        stats['peak_memory'] = tracemalloc.get_traced_memory()[1] - baseline
+        if not already_tracing:
+            tracemalloc.stop()
+
+    if trace:
+        if setup is not None:
+            setup()
+        with instrumentation.recording() as recorded:
+            func(*args, **kwargs)
+        stats['trace'] = recorded.to_dict()
+
+    return result, stats
@@ -0,0 +1,147 @@
+from pathlib import Path
+import numpy as np
+from distance_matrix import DistanceMatrix
+
+# TSPLIB node ids are 1-based, instances read here are relabelled 0..n-1 so source_node=0 keeps working
+
+# the truncated pi of the TSPLIB GEO definition, the published optima are computed with it
+PI = 3.141592
+
+
+def euclidean_rows(coords, rows):
+    diff = coords[rows, None, :] - coords[None, :, :]
+    return np.sqrt((diff ** 2).sum(axis=-1))
+
+
+def att_rows(coords, rows):
+    # pseudo-euclidean distance of the att48/att532 instances
+    diff = coords[rows, None, :] - coords[None, :, :]
+    r = np.sqrt((diff ** 2).sum(axis=-1) / 10.0)
+    t = np.floor(r + 0.5)
+    return np.where(t < r, t + 1, t)
+
+
+def geo_rows(coords, rows):
+    # coordinates are DDD.MM (degrees and minutes), distances on the idealized sphere in whole km
+    degrees = np.trunc(coords)
+    radians = PI * (degrees + 5.0 * (coords - degrees) / 3.0) / 180.0
+    latitude, longitude = radians[:, 0], radians[:, 1]
+    q1 = np.cos(longitude[rows, None] - longitude[None, :])
+    q2 = np.cos(latitude[rows, None] - latitude[None, :])
+    q3 = np.cos(latitude[rows, None] + latitude[None, :])
+    distance = np.trunc(6378.388 * np.arccos(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3)) + 1.0)
+    distance[np.arange(len(rows)), rows] = 0
+    return distance
+
+
+DISTANCE_FUNCTIONS = {
+    'EUC_2D': lambda coords, rows: np.floor(euclidean_rows(coords, rows) + 0.5),
+    'EUC_3D': lambda coords, rows: np.floor(euclidean_rows(coords, rows) + 0.5),
+    'CEIL_2D': lambda coords, rows: np.ceil(euclidean_rows(coords, rows)),
+    'ATT': att_rows,
+    'GEO': geo_rows,
+}
+
+
+def coordinate_matrix(coords, weight_type, block_size=512):
+    distance = DISTANCE_FUNCTIONS[weight_type]
+    n = len(coords)
+    matrix = np.empty((n, n), dtype=np.int32)
+    for start in range(0, n, block_size):
+        matrix[start:start + block_size] = distance(coords, np.arange(start, min(start + block_size, n)))
+    return matrix
+
+
+def explicit_matrix(values, n, weight_format):
+    # every symmetric layout is a fill of the upper or lower triangle, with or without the diagonal
+    if weight_format == 'FULL_MATRIX':
+        return values[:n * n].reshape(n, n)
+
+    matrix = np.zeros((n, n), dtype=values.dtype)
+    layouts = {
+        'UPPER_ROW': (np.triu_indices, 1), 'LOWER_COL': (np.triu_indices, 1),
+        'UPPER_DIAG_ROW': (np.triu_indices, 0), 'LOWER_DIAG_COL': (np.triu_indices, 0),
+        'LOWER_ROW': (np.tril_indices, -1), 'UPPER_COL': (np.tril_indices, -1),
+        'LOWER_DIAG_ROW': (np.tril_indices, 0), 'UPPER_DIAG_COL': (np.tril_indices, 0),
+    }
+    if weight_format not in layouts:
+        raise ValueError(f"Unsupported EDGE_WEIGHT_FORMAT: {weight_format}")
+    indices, offset = layouts[weight_format]
+    rows, cols = indices(n, offset)
+    matrix[rows, cols] = values[:len(rows)]
+    matrix[cols, rows] = values[:len(rows)]
+    return matrix
+
+
+def parse_tsplib(path):
+    # header fields and the raw tokens of every *_SECTION
+    header, sections, current = {}, {}, None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line == 'EOF':
+                continue
+            keyword = line.split(':')[0].strip().upper()
+            if keyword.endswith('_SECTION'):
+                current = sections.setdefault(keyword, [])
+                rest = line[len(keyword):].lstrip(' :')
+                if rest:
+                    current.extend(rest.split())
+            elif ':' in line and keyword.replace('_', '').isalpha():
+                header[keyword] = line.split(':', 1)[1].strip()
+                current = None
+            elif current is not None:
+                current.extend(line.split())
+    return header, sections
+
+
+def read_tsplib(path):
+    header, sections = parse_tsplib(path)
+    n = int(header['DIMENSION'])
+    weight_type = header.get('EDGE_WEIGHT_TYPE', 'EXPLICIT').upper()
+
+    if weight_type == 'EXPLICIT':
+        tokens = sections['EDGE_WEIGHT_SECTION']
+        values = np.array(tokens, dtype=np.float64)
+        if np.array_equal(values, np.round(values)):
+            values = values.astype(np.int64)
+        matrix = explicit_matrix(values, n, header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX').upper())
+    elif weight_type in DISTANCE_FUNCTIONS:
+        table = np.array(sections['NODE_COORD_SECTION'], dtype=np.float64).reshape(n, -1)
+        order = np.argsort(table[:, 0], kind='stable')
+        matrix = coordinate_matrix(table[order, 1:], weight_type)
+    else:
+        raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE: {weight_type}")
+
+    return DistanceMatrix.from_array(matrix)
+
+
+def write_tsplib(instance, path, name=None, comment=None):
+    # always written as an explicit full matrix so the file reproduces the exact weights
+    path = Path(path)
+    matrix = instance.matrix
+    integral = np.issubdtype(matrix.dtype, np.integer)
+    lines = [
+        f"NAME : {name or path.stem}",
+        "TYPE : TSP",
+    ]
+    if comment:
+        lines.append(f"COMMENT : {comment}")
+    lines += [
+        f"DIMENSION : {len(instance)}",
+        "EDGE_WEIGHT_TYPE : EXPLICIT",
+        "EDGE_WEIGHT_FORMAT : FULL_MATRIX",
+        "EDGE_WEIGHT_SECTION",
+    ]
+    for row in matrix:
+        lines.append(' '.join(str(value) for value in (row.tolist() if integral else np.round(row, 6).tolist())))
+    lines.append("EOF")
+    path.write_text('\n'.join(lines) + '\n')
+    return path
+
+
+def read_tour(path):
+    # .opt.tour files, returned as 0-based node labels
+    _, sections = parse_tsplib(path)
+    tour = [int(token) - 1 for token in sections['TOUR_SECTION']]
+    return tour[:tour.index(-2)] if -2 in tour else tour
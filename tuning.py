@@ -0,0 +1,248 @@
+import argparse
+import copy
+import json
+import math
+import random
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from distance_matrix import as_distance_matrix
+from registry import TUNED_DIR, get_solver, resolve
+from plans import load_plan, parameter_grid
+from benchmark import generate_instance, job_seed, run_job
+
+# the held-out instances use their own seed namespace, never one of the integer benchmark seeds
+HOLDOUT_SEED = 'holdout'
+
+# generator modes whose instances are point sets, tuned parameters only carry over within the same kind
+GEOMETRIC_MODES = {'euclidean', 'clustered'}
+
+SEARCH_SPACES = {
+    'genetic': {
+        'sol_per_pop': [50, 100, 200, 400],
+        'num_generations': [250, 1000, 4000],
+        'num_parents_mating': [10, 20, 40],
+        'mutation_rate': [0.1, 0.2, 0.4],
+    },
+    'ant_colony': {
+        'n_ants': [5, 10, 20, 40],
+        'n_iterations': [25, 100, 400],
+        'beta': [2.0, 3.0, 5.0],
+        'evaporation_rate': [0.1, 0.3, 0.5],
+        'variant': ['as', 'mmas', 'acs'],
+    },
+}
+
+
+def holdout_instances(num_nodes, count, mode='euclidean', store=None):
+    return [generate_instance(num_nodes, graph_num, HOLDOUT_SEED, mode, store) for graph_num in range(1, count + 1)]
+
+
+def reference_weight(instance, time_limit=10.0):
+    # optimum where Held-Karp is planned for the size, otherwise a Lin-Kernighan tour as best known
+    name = 'held_karp' if len(instance) <= get_solver('held_karp').max_nodes else 'lin_kernighan'
+    params = {} if name == 'held_karp' else {'time_limit': time_limit}
+    return run_job(instance, 0, len(instance), name, job_seed(HOLDOUT_SEED, len(instance), 0, name),
+                   params=params)['weight']
+
+
+def run_trial(instance, graph_num, solver, params):
+    # every configuration sees the same solver seed on an instance (common random numbers)
+    seed = job_seed(HOLDOUT_SEED, len(instance), graph_num, solver)
+    row = run_job(instance, graph_num, len(instance), solver, seed, params=params)
+    return row['time'], row['weight']
+
+
+def pareto_ranks(points):
+    # non-dominated sorting of (time, gap) pairs, both minimised; rank 0 is the front
+    ranks = [None] * len(points)
+    remaining = set(range(len(points)))
+    rank = 0
+    while remaining:
+        front = [i for i in remaining
+                 if not any(points[j][0] <= points[i][0] and points[j][1] <= points[i][1] and points[j] != points[i]
+                            for j in remaining)]
+        for i in front:
+            ranks[i] = rank
+        remaining -= set(front)
+        rank += 1
+    return ranks
+
+
+def summarize_trials(trials, references):
+    # median time and mean gap (%) over the instances a configuration has seen so far
+    times = [trials[i][0] for i in sorted(trials)]
+    gaps = [100.0 * (trials[i][1] - references[i]) / references[i] if references[i] else 0.0 for i in sorted(trials)]
+    return float(np.median(times)), float(np.mean(gaps))
+
+
+def successive_halving(solver, configs, instances, references, eta=3, min_instances=1, workers=1, time_limit=None):
+    # every rung runs the surviving configurations on eta times more instances and keeps the best 1/eta,
+    # ranked by Pareto rank over (time, gap) so fast-but-rough and slow-but-good configurations both survive
+    # returns {config index: (time, gap, instances seen)} for everything that was evaluated
+    rungs = max(1, math.floor(math.log(len(configs), eta)) + 1) if len(configs) > 1 else 1
+    budget = max(min_instances, math.ceil(len(instances) / eta ** (rungs - 1)))
+    if time_limit is not None and get_solver(solver).anytime:
+        configs = [{**config, 'time_limit': time_limit} for config in configs]
+
+    trials = {index: {} for index in range(len(configs))}
+    active = list(range(len(configs)))
+    scores = {}
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            budget = min(budget, len(instances))
+            pending = [(index, i) for index in active for i in range(budget) if i not in trials[index]]
+            args = [(instances[i], i + 1, solver, configs[index]) for index, i in pending]
+            if executor is not None:
+                results = executor.map(run_trial, *zip(*args)) if args else []
+            else:
+                results = [run_trial(*arg) for arg in args]
+            for (index, i), result in zip(pending, results):
+                trials[index][i] = result
+
+            for index in active:
+                done = {i: trial for i, trial in trials[index].items() if trial[0] is not None}
+                if len(done) < len(trials[index]):
+                    # failed runs count as infinitely slow and bad
+                    scores[index] = (math.inf, math.inf, len(trials[index]))
+                else:
+                    scores[index] = (*summarize_trials(done, references), len(done))
+
+            print(f"  {len(active)} configs on {budget} instances")
+            if budget == len(instances):
+                break
+            ranks = pareto_ranks([scores[index][:2] for index in active])
+            keep = max(1, len(active) // eta)
+            active = [index for _, _, index in
+                      sorted(zip(ranks, (scores[index][1] for index in active), active))[:keep]]
+            budget = len(instances) if len(active) == 1 else budget * eta
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return scores
+
+
+def pareto_front(configs, scores, num_instances):
+    # non-dominated configurations among those that ran on the whole instance set, fastest first
+    full = [index for index, score in scores.items() if score[2] == num_instances and math.isfinite(score[0])]
+    ranks = pareto_ranks([scores[index][:2] for index in full])
+    front = [{'params': configs[index], 'time': scores[index][0], 'gap': scores[index][1]}
+             for rank, index in zip(ranks, full) if rank == 0]
+    return sorted(front, key=lambda entry: (entry['time'], entry['gap']))
+
+
+def tune(solver, sizes, mode='euclidean', space=None, num_configs=27, num_instances=9, eta=3, workers=1, seed=0,
+         store=None, time_limit=None):
+    # space: {argument: value or list of values}, default SEARCH_SPACES[solver]
+    # num_configs: configurations sampled from the grid (all of them when the grid is smaller)
+    grid = parameter_grid(space if space is not None else SEARCH_SPACES[solver])
+    configs = grid if len(grid) <= num_configs else random.Random(seed).sample(grid, num_configs)
+
+    fronts = {}
+    for num_nodes in sizes:
+        print(f"Tuning {solver} on {num_instances} held-out {mode} instances of {num_nodes} nodes "
+              f"({len(configs)} configs)")
+        instances = holdout_instances(num_nodes, num_instances, mode, store)
+        references = [reference_weight(instance) for instance in instances]
+        scores = successive_halving(solver, configs, instances, references, eta, workers=workers,
+                                    time_limit=time_limit)
+        fronts[num_nodes] = pareto_front(configs, scores, num_instances)
+        for entry in fronts[num_nodes]:
+            print(f"  {entry['time']:.4f}s  gap {entry['gap']:.2f}%  {entry['params']}")
+    return fronts
+
+
+def save_tuned(solver, fronts, mode, directory=TUNED_DIR):
+    # one file per solver, sizes from earlier tuning runs are kept unless they were re-tuned
+    path = Path(directory) / f"{solver}.json"
+    tuned = copy.deepcopy(read_tuned(solver, directory))
+    if tuned.get('mode', mode) != mode:
+        # fronts tuned on another kind of instance are not comparable, start over
+        tuned = {}
+    tuned['mode'] = mode
+    tuned.setdefault('sizes', {}).update({str(num_nodes): front for num_nodes, front in fronts.items()})
+    tuned['sizes'] = dict(sorted(tuned['sizes'].items(), key=lambda item: int(item[0])))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(tuned, f, indent=2)
+    return path
+
+
+@lru_cache(maxsize=None)
+def load_tuned(path, mtime):
+    # parsed once per version of the file, the result is shared and must not be modified
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_tuned(solver, directory=TUNED_DIR):
+    path = Path(directory) / f"{solver}.json"
+    if not path.exists():
+        return {}
+    return load_tuned(path, path.stat().st_mtime_ns)
+
+
+def choose(front, tolerance=1.0):
+    # fastest configuration within `tolerance` gap percentage points of the best one on the front
+    best_gap = min(entry['gap'] for entry in front)
+    return min((entry for entry in front if entry['gap'] <= best_gap + tolerance), key=lambda entry: entry['time'])
+
+
+def tuned_params(solver, num_nodes, tolerance=1.0, directory=TUNED_DIR, geometric=None):
+    # parameters for the closest tuned size (on a log scale), {} when the solver was never tuned or,
+    # given whether the instance is geometric, when it was tuned on the other kind of instance
+    tuned = read_tuned(solver, directory)
+    if geometric is not None and tuned.get('mode') is not None and (tuned['mode'] in GEOMETRIC_MODES) != geometric:
+        warnings.warn(f"{solver} was tuned on {tuned['mode']} instances, using its default parameters "
+                      f"on {'geometric' if geometric else 'matrix'} instances")
+        return {}
+    sizes = {int(size): front for size, front in tuned.get('sizes', {}).items() if front}
+    if not sizes:
+        return {}
+    closest = min(sizes, key=lambda size: (abs(math.log(size) - math.log(max(num_nodes, 1))), size))
+    params = dict(choose(sizes[closest], tolerance)['params'])
+    params.pop('time_limit', None)
+    return params
+
+
+def with_tuned_defaults(solver):
+    # wraps a solver so its parameters default to the tuned ones for the instance size,
+    # arguments passed explicitly still win
+    def solve(graph, source_node, **kwargs):
+        instance = as_distance_matrix(graph)
+        params = tuned_params(solver, len(instance), geometric=instance.coords is not None)
+        return resolve(solver)(graph, source_node, **{**params, **kwargs})
+    return solve
+
+
+genetic_tuned = with_tuned_defaults('genetic')
+ant_colony_tuned = with_tuned_defaults('ant_colony')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune solver parameters on held-out instances")
+    parser.add_argument("solver", choices=list(SEARCH_SPACES))
+    parser.add_argument("--sizes", type=int, nargs='+', default=[20, 50, 100])
+    parser.add_argument("--generator", default='euclidean', help="instance generator mode")
+    parser.add_argument("--space", help="search space file (JSON, TOML or YAML): {argument: [values]}")
+    parser.add_argument("--configs", type=int, default=27, help="configurations sampled from the search space")
+    parser.add_argument("--instances", type=int, default=9, help="held-out instances per size")
+    parser.add_argument("--eta", type=int, default=3, help="successive halving keeps 1/eta of the configs per rung")
+    parser.add_argument("--time-limit", type=float, help="time_limit passed to every trial")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for trials")
+    parser.add_argument("--seed", type=int, default=0, help="seed for sampling configurations")
+    parser.add_argument("--store", help="directory of stored instances")
+    parser.add_argument("--output", default=TUNED_DIR, help="directory of tuned parameter files")
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        space = load_plan(args.space)
+        space.pop('name', None)
+    fronts = tune(args.solver, args.sizes, args.generator, space, args.configs, args.instances, args.eta,
+                  args.workers, args.seed, args.store, args.time_limit)
+    print(f"✓ Tuned parameters saved to {save_tuned(args.solver, fronts, args.generator, args.output)}")